@@ -181,7 +181,7 @@ export const transcriptAPI = {
   /**
    * Retry processing a failed source
    * @param {string} sourceId - Source UUID
-   * @returns {Promise<{success: boolean, processed: number, errors: Array}>}
+   * @returns {Promise<{success: boolean, source_id: string, status: string, message: string}>}
    */
   retrySource: async (sourceId) => {
     const response = await apiClient.post(`/api/transcripts/sources/${sourceId}/retry`);
@@ -173,9 +173,8 @@ export const useSourcesStore = create(
 
           const result = await transcriptAPI.retrySource(sourceId);
 
-          // Update status based on result
-          const newStatus = result.errors?.length > 0 ? 'failed' : 'ready';
-          get().updateSourceStatus(sourceId, newStatus);
+          // Retry runs in the background; the source stays 'processing' until polling picks up the result
+          get().updateSourceStatus(sourceId, result.status);
 
           return result;
         } catch (error) {
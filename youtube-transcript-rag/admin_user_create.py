@@ -1,19 +1,22 @@
-from app.services.supabase_service import create_user
+from app.services.supabase_service import create_users
+
+TEST_USERS = [
+    ('admin', 'admin123'),
+    ('testuser', 'test123'),
+]
 
 # Run this once to create test users
 if __name__ == '__main__':
     print("Creating test users...")
     
     try:
-        admin = create_user('admin', 'admin123')
-        print(f"✓ Admin user created: {admin['username']}")
-    except Exception as e:
-        print(f"Admin user may already exist: {e}")
-    
-    try:
-        test = create_user('testuser', 'test123')
-        print(f"✓ Test user created: {test['username']}")
+        created = {user['username'] for user in create_users(TEST_USERS)}
+        for username, _ in TEST_USERS:
+            if username in created:
+                print(f"✓ User created: {username}")
+            else:
+                print(f"User {username} already exists, left unchanged")
     except Exception as e:
-        print(f"Test user may already exist: {e}")
+        print(f"Failed to create users: {e}")
     
     print("Done!")
@@ -1,17 +1,63 @@
+import importlib
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from config.settings import Config
 from app.utils.logger import log_info, log_error
+from app.utils.json_provider import OrjsonProvider
 from pydantic import ValidationError
+from werkzeug.exceptions import (
+    BadRequest, Unauthorized, Forbidden, NotFound, TooManyRequests, InternalServerError
+)
 
 jwt = JWTManager()
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=[Config.RATELIMIT_DEFAULT] if Config.RATELIMIT_ENABLED else [],
-    storage_uri=Config.RATELIMIT_STORAGE_URL
+
+
+def _create_limiter():
+    """Create the rate limiter, or None when rate limiting is disabled (flask_limiter is never imported)"""
+    if not Config.RATELIMIT_ENABLED:
+        return None
+
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+
+    return Limiter(
+        key_func=get_remote_address,
+        default_limits=[Config.RATELIMIT_DEFAULT],
+        storage_uri=Config.RATELIMIT_STORAGE_URL,
+        strategy=Config.RATELIMIT_STRATEGY,
+        # Keep limiting per-process if the shared storage (Redis) becomes unreachable
+        in_memory_fallback_enabled=True
+    )
+
+
+limiter = _create_limiter()
+
+
+def rate_limit(limit_value):
+    """Per-route rate limit decorator; leaves the route untouched when rate limiting is disabled"""
+    def decorator(fn):
+        if limiter is None:
+            return fn
+        return limiter.limit(limit_value)(fn)
+    return decorator
+
+
+def rate_limit_exempt(fn):
+    """Exempt a route from the default rate limits (no-op when rate limiting is disabled)"""
+    if limiter is None:
+        return fn
+    return limiter.exempt(fn)
+
+
+# Blueprints as (module path, attribute, url prefix). They are imported lazily in
+# create_app so a blueprint whose dependencies fail to load doesn't take the whole API down.
+BLUEPRINTS = (
+    ('app.routes.auth_routes', 'auth_bp', '/api/auth'),
+    ('app.routes.transcript_routes', 'transcript_bp', '/api/transcripts'),
+    ('app.routes.query_routes', 'query_bp', '/api/query'),
+    ('app.routes.user_routes', 'user_bp', '/api/user'),
+    ('app.routes.chat_routes', 'chat_bp', '/api/chats'),
 )
 
 
@@ -19,13 +65,15 @@ def create_app():
     """Create and configure Flask application"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    # jsonify() and request.get_json() go through orjson
+    app.json = OrjsonProvider(app)
 
     # Initialize extensions
     jwt.init_app(app)
     CORS(app, origins=Config.CORS_ORIGINS)
 
     # Initialize rate limiter if enabled
-    if Config.RATELIMIT_ENABLED:
+    if limiter is not None:
         limiter.init_app(app)
         log_info(f"Rate limiting enabled: {Config.RATELIMIT_DEFAULT}")
     else:
@@ -39,21 +87,17 @@ def create_app():
     # Register error handlers
     register_error_handlers(app)
 
-    # Register blueprints
-    from app.routes.auth_routes import auth_bp
-    from app.routes.transcript_routes import transcript_bp
-    from app.routes.query_routes import query_bp
-    from app.routes.user_routes import user_bp
-    from app.routes.chat_routes import chat_bp
-
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(transcript_bp, url_prefix='/api/transcripts')
-    app.register_blueprint(query_bp, url_prefix='/api/query')
-    app.register_blueprint(user_bp, url_prefix='/api/user')
-    app.register_blueprint(chat_bp, url_prefix='/api/chats')
+    # Register blueprints (imported only after the cheap setup above)
+    for module_path, attr, url_prefix in BLUEPRINTS:
+        try:
+            blueprint = getattr(importlib.import_module(module_path), attr)
+            app.register_blueprint(blueprint, url_prefix=url_prefix)
+        except Exception as e:
+            log_error(f"Failed to register blueprint {attr} from {module_path}: {str(e)}", exc_info=True)
 
     # Health check endpoint
     @app.route('/health', methods=['GET'])
+    @rate_limit_exempt
     def health_check():
         """Health check endpoint for monitoring"""
         return jsonify({
@@ -64,6 +108,7 @@ def create_app():
 
     # Root endpoint
     @app.route('/', methods=['GET'])
+    @rate_limit_exempt
     def root():
         """Root endpoint with API information"""
         return jsonify({
@@ -84,75 +129,90 @@ def create_app():
     return app
 
 
-def register_error_handlers(app):
-    """Register global error handlers"""
-
-    @app.errorhandler(ValidationError)
-    def handle_validation_error(e):
-        """Handle Pydantic validation errors"""
-        log_error(f"Validation error: {str(e)}")
-        return jsonify({
-            'error': 'ValidationError',
-            'message': 'Request validation failed',
-            'details': e.errors()
-        }), 400
-
-    @app.errorhandler(400)
-    def handle_bad_request(e):
-        """Handle bad request errors"""
-        log_error(f"Bad request: {str(e)}")
-        return jsonify({
-            'error': 'BadRequest',
-            'message': str(e)
-        }), 400
-
-    @app.errorhandler(401)
-    def handle_unauthorized(e):
-        """Handle unauthorized errors"""
-        return jsonify({
-            'error': 'Unauthorized',
-            'message': 'Authentication required'
-        }), 401
+def handle_validation_error(e):
+    """Handle Pydantic validation errors"""
+    log_error(f"Validation error: {str(e)}")
+    return jsonify({
+        'error': 'ValidationError',
+        'message': 'Request validation failed',
+        'details': e.errors(include_url=False, include_context=False, include_input=False)
+    }), 400
+
+
+def handle_bad_request(e):
+    """Handle bad request errors"""
+    log_error(f"Bad request: {str(e)}")
+    return jsonify({
+        'error': 'BadRequest',
+        'message': str(e)
+    }), 400
+
+
+def handle_unauthorized(e):
+    """Handle unauthorized errors"""
+    return jsonify({
+        'error': 'Unauthorized',
+        'message': 'Authentication required'
+    }), 401
+
+
+def handle_forbidden(e):
+    """Handle forbidden errors"""
+    return jsonify({
+        'error': 'Forbidden',
+        'message': 'Access denied'
+    }), 403
+
+
+def handle_not_found(e):
+    """Handle not found errors"""
+    return jsonify({
+        'error': 'NotFound',
+        'message': 'Resource not found'
+    }), 404
+
+
+def handle_rate_limit_exceeded(e):
+    """Handle rate limit exceeded errors"""
+    log_error(f"Rate limit exceeded: {str(e)}")
+    return jsonify({
+        'error': 'RateLimitExceeded',
+        'message': 'Too many requests. Please try again later.'
+    }), 429
+
+
+def handle_internal_error(e):
+    """Handle internal server errors"""
+    log_error(f"Internal server error: {str(e)}")
+    return jsonify({
+        'error': 'InternalServerError',
+        'message': 'An internal error occurred. Please try again later.'
+    }), 500
+
+
+def handle_unexpected_error(e):
+    """Handle unexpected errors"""
+    log_error(f"Unexpected error: {str(e)}", exc_info=True)
+    return jsonify({
+        'error': 'UnexpectedError',
+        'message': 'An unexpected error occurred. Please try again later.'
+    }), 500
+
+
+# Exception type -> handler, registered in order (generic Exception last)
+ERROR_HANDLERS = {
+    ValidationError: handle_validation_error,
+    BadRequest: handle_bad_request,
+    Unauthorized: handle_unauthorized,
+    Forbidden: handle_forbidden,
+    NotFound: handle_not_found,
+    TooManyRequests: handle_rate_limit_exceeded,
+    InternalServerError: handle_internal_error,
+    Exception: handle_unexpected_error,
+}
 
-    @app.errorhandler(403)
-    def handle_forbidden(e):
-        """Handle forbidden errors"""
-        return jsonify({
-            'error': 'Forbidden',
-            'message': 'Access denied'
-        }), 403
 
-    @app.errorhandler(404)
-    def handle_not_found(e):
-        """Handle not found errors"""
-        return jsonify({
-            'error': 'NotFound',
-            'message': 'Resource not found'
-        }), 404
-
-    @app.errorhandler(429)
-    def handle_rate_limit_exceeded(e):
-        """Handle rate limit exceeded errors"""
-        log_error(f"Rate limit exceeded: {str(e)}")
-        return jsonify({
-            'error': 'RateLimitExceeded',
-            'message': 'Too many requests. Please try again later.'
-        }), 429
-
-    @app.errorhandler(500)
-    def handle_internal_error(e):
-        """Handle internal server errors"""
-        log_error(f"Internal server error: {str(e)}")
-        return jsonify({
-            'error': 'InternalServerError',
-            'message': 'An internal error occurred. Please try again later.'
-        }), 500
-
-    @app.errorhandler(Exception)
-    def handle_unexpected_error(e):
-        """Handle unexpected errors"""
-        log_error(f"Unexpected error: {str(e)}", exc_info=True)
-        return jsonify({
-            'error': 'UnexpectedError',
-            'message': 'An unexpected error occurred. Please try again later.'
-        }), 500
+def register_error_handlers(app):
+    """Register global error handlers"""
+    for exc_class, handler in ERROR_HANDLERS.items():
+        app.register_error_handler(exc_class, handler)
@@ -0,0 +1,346 @@
+"""
+Database Models and Pydantic Schemas for Request/Response Validation
+
+This module contains:
+1. Database schema documentation (Supabase tables)
+2. Pydantic models for API request/response validation
+3. Data transfer objects (DTOs)
+"""
+
+import re
+from datetime import datetime
+from typing import Annotated, List, Optional, Dict, Any, Literal
+import numpy as np
+from pydantic import AfterValidator, BaseModel, BeforeValidator, ConfigDict, Field, PlainSerializer, StringConstraints, validator, field_validator
+from uuid import UUID
+
+
+# ============================================================================
+# DATABASE SCHEMAS (Supabase)
+# ============================================================================
+
+"""
+Users Table Schema:
+-------------------
+CREATE TABLE users (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    username VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    credits INTEGER DEFAULT 1000,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+Sources Table Schema:
+--------------------
+CREATE TABLE sources (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,  -- Original creator
+    video_ids TEXT[] NOT NULL,
+    title TEXT NOT NULL,
+    pinecone_namespace VARCHAR(255),
+    metadata JSONB,
+    status VARCHAR(20) DEFAULT 'processing'
+        CHECK (status IN ('processing', 'ready', 'failed')),
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX idx_sources_user_id ON sources(user_id);
+CREATE INDEX idx_sources_status ON sources(status);
+CREATE INDEX idx_sources_video_ids ON sources USING GIN(video_ids);  -- For duplicate detection
+
+User_Sources Table Schema (Many-to-Many):
+-----------------------------------------
+CREATE TABLE user_sources (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    source_id UUID REFERENCES sources(id) ON DELETE CASCADE,
+    created_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE(user_id, source_id)  -- Prevent duplicate associations
+);
+
+CREATE INDEX idx_user_sources_user_id ON user_sources(user_id);
+CREATE INDEX idx_user_sources_source_id ON user_sources(source_id);
+
+Pinecone Vector Schema:
+----------------------
+{
+    'id': str,  # Format: "{video_id}_{chunk_index}"
+    'values': List[float],  # 384 dimensions
+    'metadata': {
+        'video_id': str,
+        'text': str,  # Max 1000 chars
+        'start_time': float,
+        'end_time': float,
+        'language': str,
+        'language_code': str,
+        'source_id': str,
+        'user_id': str
+    }
+}
+"""
+
+
+# ============================================================================
+# REQUEST SCHEMAS (Input Validation)
+# ============================================================================
+
+# Alphanumeric usernames with underscores and hyphens allowed
+_USERNAME_RE = re.compile(r'[A-Za-z0-9_-]+', re.ASCII)
+
+
+def _validate_username(v: str) -> str:
+    if not _USERNAME_RE.fullmatch(v):
+        raise ValueError('Username must be alphanumeric (underscores and hyphens allowed)')
+    return v.lower()
+
+
+Username = Annotated[str, StringConstraints(min_length=3, max_length=50), AfterValidator(_validate_username)]
+
+
+class LoginRequest(BaseModel):
+    """User login request"""
+    username: Username = Field(..., description="Username")
+    password: str = Field(..., min_length=6, max_length=100, description="Password")
+
+
+class CreateUserRequest(BaseModel):
+    """Create new user request"""
+    username: Username
+    password: str = Field(..., min_length=8, max_length=100)
+    initial_credits: int = Field(default=1000, ge=0, description="Initial credit balance")
+
+    @field_validator('password')
+    @classmethod
+    def password_strength(cls, v: str) -> str:
+        if not any(c.isdigit() for c in v):
+            raise ValueError('Password must contain at least one digit')
+        if not any(c.isalpha() for c in v):
+            raise ValueError('Password must contain at least one letter')
+        return v
+
+
+class ProcessTranscriptRequest(BaseModel):
+    """Request to process YouTube video(s) or playlist"""
+    url: str = Field(..., description="YouTube video or playlist URL")
+
+    @field_validator('url')
+    @classmethod
+    def validate_youtube_url(cls, v: str) -> str:
+        if not ('youtube.com' in v or 'youtu.be' in v):
+            raise ValueError('Must be a valid YouTube URL')
+        return v
+
+
+class QueryRequest(BaseModel):
+    """RAG query request"""
+    source_id: UUID = Field(..., description="Source ID to query")
+    question: str = Field(..., min_length=3, max_length=500, description="Question to ask")
+
+
+class CreateChatRequest(BaseModel):
+    """Create chat request"""
+    source_id: str = Field(..., min_length=1, description="Source ID the chat is about")
+    title: str = Field(default='New Chat', min_length=1, max_length=200, description="Chat title")
+
+
+class PaginationParams(BaseModel):
+    """Pagination parameters"""
+    page: int = Field(default=1, ge=1, description="Page number")
+    limit: int = Field(default=20, ge=1, le=100, description="Items per page")
+
+
+class ChatListParams(BaseModel):
+    """Chat list query parameters"""
+    search: str = Field(default='', max_length=200, description="Title search keyword")
+    limit: int = Field(default=50, ge=1, le=100, description="Items per page")
+    offset: int = Field(default=0, ge=0, description="Items to skip")
+
+
+class MessageListParams(BaseModel):
+    """Chat message list query parameters"""
+    limit: int = Field(default=100, ge=1, le=200, description="Items per page")
+    offset: int = Field(default=0, ge=0, description="Items to skip (legacy, prefer after)")
+    after: Optional[str] = Field(default=None, description="Keyset cursor (next_cursor of the previous page)")
+
+
+# ============================================================================
+# RESPONSE SCHEMAS (Output Validation)
+# ============================================================================
+
+class TokenResponse(BaseModel):
+    """JWT token response"""
+    access_token: str
+    refresh_token: Optional[str] = None
+
+
+class UserResponse(BaseModel):
+    """User profile response"""
+    id: str
+    username: str
+    credits: int
+    created_at: datetime
+
+
+class CreditsResponse(BaseModel):
+    """User credits response"""
+    credits: int
+
+
+class SourceMetadata(BaseModel):
+    """Source metadata"""
+    video_count: Optional[int] = None
+    language: Optional[str] = None
+    duration: Optional[float] = None
+    additional_info: Optional[Dict[str, Any]] = None
+
+
+class SourceResponse(BaseModel):
+    """Source response"""
+    id: str
+    title: str
+    video_ids: List[str]
+    status: Literal['processing', 'ready', 'failed']
+    metadata: Optional[SourceMetadata] = None
+    created_at: datetime
+    pinecone_namespace: Optional[str] = None
+
+
+class PaginationInfo(BaseModel):
+    """Pagination metadata returned with list responses"""
+    model_config = ConfigDict(frozen=True)
+
+    page: int
+    limit: int
+    total: int
+    pages: int
+
+
+class SourceListResponse(BaseModel):
+    """Paginated source list response"""
+    sources: List[SourceResponse]
+    pagination: PaginationInfo
+
+
+class ProcessTranscriptResponse(BaseModel):
+    """Response when starting transcript processing"""
+    source_id: str
+    status: Literal['processing', 'ready', 'failed']
+    message: str
+
+
+class RelevantChunk(BaseModel):
+    """Relevant transcript chunk from RAG search"""
+    video_id: str
+    text: str
+    start_time: float
+    end_time: float
+    relevance_score: float
+    language: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    """RAG query response"""
+    answer: str
+    sources: List[RelevantChunk]
+    credits_remaining: int
+
+
+class ErrorResponse(BaseModel):
+    """Standard error response"""
+    error: str
+    message: str
+    details: Optional[Dict[str, Any]] = None
+
+
+class SuccessResponse(BaseModel):
+    """Standard success response"""
+    message: str
+    data: Optional[Dict[str, Any]] = None
+
+
+# ============================================================================
+# INTERNAL DATA MODELS
+# ============================================================================
+
+class VideoMetadata(BaseModel):
+    """Video metadata from YouTube"""
+    video_id: str
+    title: str
+    duration: Optional[float] = None
+    thumbnail: Optional[str] = None
+    channel: Optional[str] = None
+
+
+class TranscriptChunk(BaseModel):
+    """Transcript chunk for processing"""
+    text: str
+    start_time: float
+    duration: float
+
+    @property
+    def end_time(self) -> float:
+        return self.start_time + self.duration
+
+
+def _to_embedding_array(v: Any) -> np.ndarray:
+    """Coerce a sequence of floats to a 384-dim float32 array"""
+    values = np.asarray(v, dtype=np.float32)
+    if values.shape != (384,):
+        raise ValueError('Embedding must have 384 dimensions')
+    return values
+
+
+# float32 ndarray (~1.5 KB per vector vs ~11 KB for a list of Python floats);
+# converted back to a list only when serialized to JSON for the wire
+Embedding = Annotated[
+    np.ndarray,
+    BeforeValidator(_to_embedding_array),
+    PlainSerializer(lambda v: v.tolist(), return_type=List[float], when_used='json'),
+]
+
+
+class EmbeddingVector(BaseModel):
+    """Embedding vector with metadata"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    id: str
+    values: Embedding
+    metadata: Dict[str, Any]
+
+
+class ProcessingStatus(BaseModel):
+    """Video processing status"""
+    video_id: str
+    status: Literal['pending', 'processing', 'completed', 'failed']
+    error: Optional[str] = None
+
+
+# ============================================================================
+# UTILITY FUNCTIONS
+# ============================================================================
+
+def validate_request(model: type[BaseModel], data: dict) -> BaseModel:
+    """
+    Validate request data against Pydantic model
+
+    Args:
+        model: Pydantic model class
+        data: Request data dictionary
+
+    Returns:
+        Validated model instance
+
+    Raises:
+        ValidationError: If validation fails (handled by the global error handler)
+    """
+    return model.model_validate(data)
+
+
+def create_error_response(error: str, message: str, details: Optional[Dict] = None) -> Dict:
+    """Create standardized error response (same shape as ErrorResponse, built without validation)"""
+    return {'error': error, 'message': message, 'details': details}
+
+
+def create_success_response(message: str, data: Optional[Dict] = None) -> Dict:
+    """Create standardized success response (same shape as SuccessResponse, built without validation)"""
+    return {'message': message, 'data': data}
@@ -1,21 +1,50 @@
+import threading
+from cachetools import TTLCache
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from app import rate_limit
+from app.models.schemas import LoginRequest
 from app.services.supabase_service import get_user, check_password
+from config.settings import Config
 
 auth_bp = Blueprint('auth', __name__)
 
+# Short-lived cache of user lookups (hits and misses) so repeated login
+# attempts for the same username don't each cost a database round trip
+_user_cache = TTLCache(maxsize=1024, ttl=5)
+_user_cache_lock = threading.Lock()
+
+# Unknown usernames are checked against this hash so a failed login costs one
+# bcrypt verify whether or not the user exists (no timing oracle on usernames).
+# Precomputed with the default cost factor (12) so importing doesn't spend a hash.
+_DUMMY_PASSWORD_HASH = '$2b$12$0eeQ8yuIVKCZU/M46Lz5EummpOOWk3AkF8McxzZjL22x8djUH6ZuK'
+
+
+def _cached_get_user(username):
+    """Get user by username through the short-TTL login cache"""
+    with _user_cache_lock:
+        if username in _user_cache:
+            return _user_cache[username]
+
+    user = get_user(username)
+
+    with _user_cache_lock:
+        _user_cache[username] = user
+    return user
+
+
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit(Config.RATELIMIT_LOGIN)
 def login():
     """Login and get access + refresh tokens"""
-    data = request.json
-    username = data.get('username')
-    password = data.get('password')
-    
-    if not username or not password:
-        return jsonify({'error': 'Username and password required'}), 400
-    
-    user = get_user(username)
-    if not user or not check_password(password, user['password_hash']):
+    # Validation errors are handled by the global ValidationError handler (400)
+    credentials = LoginRequest.model_validate(request.get_json(silent=True) or {})
+
+    user = _cached_get_user(credentials.username)
+    if user is None:
+        check_password(credentials.password, _DUMMY_PASSWORD_HASH)
+        return jsonify({'error': 'Invalid credentials'}), 401
+    if not check_password(credentials.password, user['password_hash']):
         return jsonify({'error': 'Invalid credentials'}), 401
     
     # Create tokens with user ID as identity
@@ -11,6 +11,8 @@ from app.services.supabase_service import (
     get_user_by_id,
     get_source_by_id
 )
+from app.models.schemas import ChatListParams, CreateChatRequest, MessageListParams
+from app.utils.helpers import encode_cursor, decode_cursor
 from app.utils.logger import log_info, log_error, log_warning, log_debug
 
 chat_bp = Blueprint('chat', __name__)
@@ -23,17 +25,11 @@ def get_chats():
     Query params: ?search=keyword&limit=50&offset=0
     """
     user_id = get_jwt_identity()
+    # Validated outside the try so bad params reach the global ValidationError handler (400)
+    params = ChatListParams.model_validate(request.args.to_dict())
+    search, limit, offset = params.search, params.limit, params.offset
 
     try:
-        # Get query parameters
-        search = request.args.get('search', '')
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
-
-        # Validate limit
-        if limit < 1 or limit > 100:
-            limit = 50
-
         log_debug(f"Fetching chats for user {user_id} (search={search}, limit={limit}, offset={offset})")
 
         # Get chats from database
@@ -88,16 +84,11 @@ def create_new_chat():
     """
     user_id = get_jwt_identity()
 
-    try:
-        if not request.json:
-            return jsonify({'error': 'Request body required'}), 400
-
-        data = request.json
-        source_id = data.get('source_id')
-
-        if not source_id:
-            return jsonify({'error': 'source_id is required'}), 400
+    # Validation errors are handled by the global ValidationError handler (400)
+    chat_request = CreateChatRequest.model_validate(request.get_json(silent=True) or {})
+    source_id = chat_request.source_id
 
+    try:
         # Verify source exists and user owns it
         source = get_source_by_id(source_id)
         if not source:
@@ -107,10 +98,8 @@ def create_new_chat():
             return jsonify({'error': 'You do not have access to this source'}), 403
 
         # Create chat with default title (will be updated with first message)
-        title = data.get('title', 'New Chat')
-
         log_info(f"Creating new chat for user {user_id} with source {source_id}")
-        chat = create_chat(user_id, source_id, title)
+        chat = create_chat(user_id, source_id, chat_request.title)
 
         return jsonify(chat), 201
 
@@ -147,8 +136,14 @@ def delete_chat_endpoint(chat_id):
 @chat_bp.route('/<chat_id>/messages', methods=['GET'])
 @jwt_required()
 def get_chat_messages_endpoint(chat_id):
-    """Get messages for a chat (with pagination)"""
+    """
+    Get messages for a chat (with pagination)
+    Query params: ?limit=100&after=<next_cursor of the previous page> (or legacy &offset=0)
+    """
     user_id = get_jwt_identity()
+    # Validated outside the try so bad params reach the global ValidationError handler (400)
+    params = MessageListParams.model_validate(request.args.to_dict())
+    limit, offset = params.limit, params.offset
 
     try:
         # Verify chat exists and user owns it
@@ -159,21 +154,27 @@ def get_chat_messages_endpoint(chat_id):
         if chat['user_id'] != user_id:
             return jsonify({'error': 'You do not have access to this chat'}), 403
 
-        # Get pagination parameters
-        limit = int(request.args.get('limit', 100))
-        offset = int(request.args.get('offset', 0))
+        # Keyset cursor from a previous page's next_cursor
+        after = None
+        if params.after:
+            try:
+                after = decode_cursor(params.after)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
 
-        # Validate limit
-        if limit < 1 or limit > 200:
-            limit = 100
+        messages = get_messages_by_chat(chat_id, limit=limit, offset=offset, after=after)
 
-        messages = get_messages_by_chat(chat_id, limit=limit, offset=offset)
+        next_cursor = None
+        if len(messages) == limit:
+            last_message = messages[-1]
+            next_cursor = encode_cursor(last_message['created_at'], last_message['id'])
 
         return jsonify({
             'messages': messages,
             'chat_id': chat_id,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_cursor': next_cursor
         }), 200
 
     except Exception as e:
@@ -1,222 +1,488 @@
-from flask import Blueprint, request, jsonify
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.pinecone_service import PineconeService
-from app.services.ai_service import AIService
+from app.services.pinecone_service import get_pinecone_service
+from app.services.ai_service import get_ai_service
+from app.services.embedding_service import EmbeddingService
+from app.services.semantic_cache import get_semantic_cache
+from app.services.background_processor import BackgroundProcessor
+from app.services.request_store import get_request_store, PENDING
 from app.services.supabase_service import (
     update_credits,
     get_user_by_id,
-    get_source_by_id,
+    get_user_and_source,
     create_chat,
+    delete_chat,
     create_message,
     update_chat_title
 )
 from app.utils.logger import log_info, log_error, log_warning, log_debug
 from config.settings import Config
-import os
-import json
+import orjson
 
 query_bp = Blueprint('query', __name__)
 
-@query_bp.route('/ask', methods=['POST'])
-@jwt_required()
-def ask_question():
-    """Ask question about video(s) using RAG"""
-    user_id = get_jwt_identity()
+# Dedicated workers for post-answer writes so they never queue behind long source processing tasks
+_persist_processor = None
+_persist_processor_lock = threading.Lock()
+
+# Creates new chats while the answer is being generated
+_chat_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='chat-create')
+
+
+class QueryAbort(Exception):
+    """Stops the RAG pipeline early with the JSON payload and status to return"""
+
+    def __init__(self, payload, status):
+        super().__init__(payload.get('error'))
+        self.payload = payload
+        self.status = status
+
+
+def _prepare_query(user_id, data):
+    """Validate the request and check user credits and source access"""
+    # Validate request data
+    if not data:
+        log_warning(f"Empty request body from user {user_id}")
+        raise QueryAbort({'error': 'Request body required'}, 400)
+
+    question = data.get('question') or data.get('query')  # Support both field names
+    video_ids = data.get('video_ids')
+    source_id = data.get('source_id')
+    chat_id = data.get('chat_id')  # Optional: existing chat ID
+    request_id = data.get('request_id')  # Optional: client idempotency key for retries
+    model = data.get('model', 'openrouter/auto')
+    # Use Config.TOP_K_RESULTS as default instead of hardcoded 5
+    top_k = data.get('top_k') or Config.TOP_K_RESULTS
+
+    # Validate question
+    if not question or not question.strip():
+        log_warning(f"Empty question from user {user_id}")
+        raise QueryAbort({'error': 'Question is required'}, 400)
+
+    if len(question) > 500:
+        log_warning(f"Question too long from user {user_id}: {len(question)} chars")
+        raise QueryAbort({'error': 'Question must be less than 500 characters'}, 400)
+
+    # Validate top_k parameter
+    if not isinstance(top_k, int) or top_k < 1 or top_k > 50:
+        log_debug("Invalid top_k value %s, using config default: %s", top_k, Config.TOP_K_RESULTS)
+        top_k = Config.TOP_K_RESULTS
+
+    log_info("Query request from user %s: '%.50s...'", user_id, question)
+
+    # Check if user exists and has credits (the source, if any, is loaded in the same round trip)
+    if source_id:
+        user, source = get_user_and_source(user_id, source_id)
+    else:
+        user, source = get_user_by_id(user_id), None
+    if not user:
+        log_error(f"User {user_id} not found in database")
+        raise QueryAbort({'error': 'User not found'}, 404)
+
+    if user.get('credits', 0) <= 0:
+        log_warning(f"User {user_id} has insufficient credits")
+        raise QueryAbort({
+            'error': 'Insufficient credits',
+            'message': 'You need credits to ask questions. Please contact support.'
+        }, 402)
+
+    # Handle source_id or video_ids
+    if source_id:
+        log_debug("Using source_id: %s", source_id)
+
+        if not source:
+            log_error(f"Source {source_id} not found")
+            raise QueryAbort({'error': 'Source not found'}, 404)
+
+        if source.get('user_id') != user_id:
+            log_warning(f"User {user_id} attempted to access unauthorized source {source_id}")
+            raise QueryAbort({'error': 'You do not have access to this source'}, 403)
+
+        if source.get('status') != 'ready':
+            log_warning(f"Source {source_id} is not ready (status: {source.get('status')})")
+            raise QueryAbort({
+                'error': 'Source not ready',
+                'message': f"This source is {source.get('status')}. Please wait until processing is complete.",
+                'status': source.get('status')
+            }, 400)
+
+        video_ids = source.get('video_ids', [])
+        log_debug("Retrieved %d video IDs from source", len(video_ids))
+
+        # Note: Chat will be created after successful AI response if chat_id is not provided
+        if chat_id:
+            log_debug("Using existing chat %s", chat_id)
+
+    elif video_ids:
+        if not isinstance(video_ids, list) or len(video_ids) == 0:
+            log_warning(f"Invalid video_ids format from user {user_id}")
+            raise QueryAbort({'error': 'video_ids must be a non-empty list'}, 400)
+        log_debug("Using provided video_ids: %d videos", len(video_ids))
+    else:
+        log_warning(f"Neither source_id nor video_ids provided by user {user_id}")
+        raise QueryAbort({'error': 'Either source_id or video_ids is required'}, 400)
+
+    return {
+        'user': user,
+        'question': question,
+        'video_ids': video_ids,
+        'source_id': source_id,
+        'chat_id': chat_id,
+        'request_id': request_id,
+        'model': model,
+        'top_k': top_k
+    }
 
+
+def _claim_request(user_id, query):
+    """
+    Reserve the client's request_id before any chat is created or answer generated.
+
+    Returns:
+        The response recorded for an already completed request, or None to proceed
+    """
+    if not query['request_id']:
+        return None
+
+    previous = get_request_store().claim((user_id, query['request_id']))
+    if previous == PENDING:
+        log_info("Request %s from user %s is already in progress", query['request_id'], user_id)
+        raise QueryAbort({'error': 'Request already in progress', 'request_id': query['request_id']}, 409)
+    if previous is not None:
+        log_info("Request %s from user %s already answered, returning the original response", query['request_id'], user_id)
+        return previous
+
+    query['request_claimed'] = True
+    return None
+
+
+def _release_request(user_id, query):
+    """Drop the request_id claim of a request that failed, so the client can retry it"""
+    if query and query.pop('request_claimed', False):
+        get_request_store().release((user_id, query['request_id']))
+
+
+def _retrieve_context(user_id, query):
+    """Find context chunks for the question (semantic cache first, then Pinecone)"""
+    question, source_id, video_ids, top_k = query['question'], query['source_id'], query['video_ids'], query['top_k']
+
+    # Initialize services
     try:
-        # Validate request data
-        if not request.json:
-            log_warning(f"Empty request body from user {user_id}")
-            return jsonify({'error': 'Request body required'}), 400
-
-        data = request.json
-        question = data.get('question') or data.get('query')  # Support both field names
-        video_ids = data.get('video_ids')
-        source_id = data.get('source_id')
-        chat_id = data.get('chat_id')  # Optional: existing chat ID
-        model = data.get('model', 'openrouter/auto')
-        # Use Config.TOP_K_RESULTS as default instead of hardcoded 5
-        top_k = data.get('top_k') or Config.TOP_K_RESULTS
-
-        # Validate question
-        if not question or not question.strip():
-            log_warning(f"Empty question from user {user_id}")
-            return jsonify({'error': 'Question is required'}), 400
-
-        if len(question) > 500:
-            log_warning(f"Question too long from user {user_id}: {len(question)} chars")
-            return jsonify({'error': 'Question must be less than 500 characters'}), 400
-
-        # Validate top_k parameter
-        if not isinstance(top_k, int) or top_k < 1 or top_k > 50:
-            log_debug(f"Invalid top_k value {top_k}, using config default: {Config.TOP_K_RESULTS}")
-            top_k = Config.TOP_K_RESULTS
-
-        log_info(f"Query request from user {user_id}: '{question[:50]}...'")
-
-        # Check if user exists and has credits
-        user = get_user_by_id(user_id)
-        if not user:
-            log_error(f"User {user_id} not found in database")
-            return jsonify({'error': 'User not found'}), 404
-
-        if user.get('credits', 0) <= 0:
-            log_warning(f"User {user_id} has insufficient credits")
-            return jsonify({
-                'error': 'Insufficient credits',
-                'message': 'You need credits to ask questions. Please contact support.'
-            }), 402
-
-        # Handle source_id or video_ids
-        if source_id:
-            log_debug(f"Using source_id: {source_id}")
-            source = get_source_by_id(source_id)
-
-            if not source:
-                log_error(f"Source {source_id} not found")
-                return jsonify({'error': 'Source not found'}), 404
-
-            if source.get('user_id') != user_id:
-                log_warning(f"User {user_id} attempted to access unauthorized source {source_id}")
-                return jsonify({'error': 'You do not have access to this source'}), 403
-
-            if source.get('status') != 'ready':
-                log_warning(f"Source {source_id} is not ready (status: {source.get('status')})")
-                return jsonify({
-                    'error': 'Source not ready',
-                    'message': f"This source is {source.get('status')}. Please wait until processing is complete.",
-                    'status': source.get('status')
-                }), 400
-
-            video_ids = source.get('video_ids', [])
-            log_debug(f"Retrieved {len(video_ids)} video IDs from source")
-
-            # Note: Chat will be created after successful AI response if chat_id is not provided
-            if chat_id:
-                log_debug(f"Using existing chat {chat_id}")
-
-        elif video_ids:
-            if not isinstance(video_ids, list) or len(video_ids) == 0:
-                log_warning(f"Invalid video_ids format from user {user_id}")
-                return jsonify({'error': 'video_ids must be a non-empty list'}), 400
-            log_debug(f"Using provided video_ids: {len(video_ids)} videos")
-        else:
-            log_warning(f"Neither source_id nor video_ids provided by user {user_id}")
-            return jsonify({'error': 'Either source_id or video_ids is required'}), 400
-
-        # Initialize services
-        try:
-            pinecone_service = PineconeService()
-            ai_service = AIService()
-        except Exception as service_error:
-            log_error(f"Failed to initialize services: {str(service_error)}", exc_info=True)
-            return jsonify({'error': 'Service initialization failed. Please try again later.'}), 503
+        pinecone_service = get_pinecone_service()
+        query['ai_service'] = get_ai_service()
+    except Exception as service_error:
+        log_error(f"Failed to initialize services: {str(service_error)}", exc_info=True)
+        raise QueryAbort({'error': 'Service initialization failed. Please try again later.'}, 503)
+
+    # Embed the question once; the vector is shared by the semantic cache and Pinecone
+    semantic_cache = get_semantic_cache()
+    query['cache_scope'] = (source_id or tuple(sorted(video_ids)), top_k)
+    query['cached_result'] = None
+    cache_hit = None
+    try:
+        query['embedding'] = EmbeddingService().embed(question)
+        if semantic_cache:
+            cache_hit = semantic_cache.lookup(query['cache_scope'], query['embedding'])
+    except Exception as embed_error:
+        log_error(f"Question embedding failed: {str(embed_error)}", exc_info=True)
+        raise QueryAbort({'error': 'Failed to search video content. Please try again.'}, 500)
+
+    if cache_hit:
+        similarity, cached = cache_hit
+        log_info("Reusing cached context for similar question (similarity=%.3f)", similarity)
+        context_chunks = cached['context_chunks']
 
+        if similarity >= semantic_cache.answer_threshold and cached['result'] and cached['model'] == query['model']:
+            log_info("Reusing cached answer for near-identical question")
+            query['cached_result'] = cached['result']
+    else:
         # Search vector store
-        log_info(f"Querying vector store with top_k={top_k}")
+        log_info("Querying vector store with top_k=%d", top_k)
         try:
             context_chunks = pinecone_service.query_videos(
                 query_text=question,
                 video_ids=video_ids,
                 source_id=source_id,
-                top_k=top_k
+                top_k=top_k,
+                query_embedding=query['embedding']
             )
         except Exception as query_error:
             log_error(f"Vector search failed: {str(query_error)}", exc_info=True)
-            return jsonify({'error': 'Failed to search video content. Please try again.'}), 500
-
-        if not context_chunks or len(context_chunks) == 0:
-            log_warning(f"No relevant content found for query from user {user_id}")
-            return jsonify({
-                'error': 'No relevant content found',
-                'message': 'Could not find relevant information in the video transcripts for your question.',
-                'response': [{
-                    'text': "I couldn't find relevant information in the video transcripts to answer your question. Try rephrasing or asking something more specific.",
-                    'timestamp': None,
-                    'video_id': None
-                }],
-                'sources': []
-            }), 200  # Return 200 with explanation instead of 404
-
-        log_info(f"Found {len(context_chunks)} relevant chunks")
-
-        # Generate answer BEFORE creating chat (if needed)
+            raise QueryAbort({'error': 'Failed to search video content. Please try again.'}, 500)
+
+    if not context_chunks or len(context_chunks) == 0:
+        log_warning(f"No relevant content found for query from user {user_id}")
+        raise QueryAbort({
+            'error': 'No relevant content found',
+            'message': 'Could not find relevant information in the video transcripts for your question.',
+            'response': [{
+                'text': "I couldn't find relevant information in the video transcripts to answer your question. Try rephrasing or asking something more specific.",
+                'timestamp': None,
+                'video_id': None
+            }],
+            'sources': []
+        }, 200)  # Return 200 with explanation instead of 404
+
+    log_info("Found %d relevant chunks", len(context_chunks))
+    query['context_chunks'] = context_chunks
+
+
+def _cache_answer(query, result):
+    """Remember a freshly generated answer for similar follow-up questions"""
+    semantic_cache = get_semantic_cache()
+    if semantic_cache:
+        semantic_cache.store(
+            query['cache_scope'], query['embedding'], query['context_chunks'],
+            result=result, model=query['model']
+        )
+
+
+def _start_chat_creation(user_id, query):
+    """Create the chat for a first-turn question concurrently with answer generation"""
+    if query['chat_id'] or not query['source_id']:
+        return
+
+    question = query['question']
+    # Use first few words of question as title
+    title = question[:50] + ("..." if len(question) > 50 else "")
+    log_info("Creating new chat for source %s alongside answer generation", query['source_id'])
+    query['chat_future'] = _chat_executor.submit(create_chat, user_id, query['source_id'], title)
+
+
+def _discard_pending_chat(query):
+    """Delete a chat created for a question whose answer failed, so no empty chat is left behind"""
+    chat_future = query.pop('chat_future', None)
+    if not chat_future:
+        return
+
+    try:
+        chat = chat_future.result()
+        if chat:
+            delete_chat(chat['id'])
+            log_debug("Deleted chat %s after failed answer generation", chat['id'])
+    except Exception as chat_error:
+        log_error(f"Failed to discard pending chat: {str(chat_error)}")
+
+
+def _get_persist_processor():
+    """Get or create the background processor for chat history and credit writes"""
+    global _persist_processor
+
+    if _persist_processor is None:
+        with _persist_processor_lock:
+            if _persist_processor is None:
+                processor = BackgroundProcessor(num_workers=2)
+                processor.start()
+                _persist_processor = processor
+
+    return _persist_processor
+
+
+def _persist_turn(user_id, username, chat_id, question, answer_json, model_used, primary_source, credits_cost):
+    """Save the question/answer messages and deduct credits (runs off the request path)"""
+    # Save user message and assistant message to chat history
+    if chat_id:
         try:
-            log_debug(f"Generating answer with model: {model}")
-            result = ai_service.generate_answer(question, context_chunks, model)
-        except Exception as ai_error:
-            log_error(f"AI generation failed: {str(ai_error)}", exc_info=True)
-            return jsonify({'error': 'Failed to generate answer. Please try again.'}), 500
-
-        # Create chat AFTER successful AI response (only if chat_id not provided)
-        if not chat_id and source_id:
-            try:
-                # Use first few words of question as title
-                title = question[:50] + ("..." if len(question) > 50 else "")
-                log_info(f"Creating new chat for source {source_id} after successful AI response")
-                chat = create_chat(user_id, source_id, title)
-                chat_id = chat['id']
-                log_debug(f"Created chat {chat_id}")
-            except Exception as chat_error:
-                log_error(f"Failed to create chat: {str(chat_error)}")
-                # Continue without saving messages if chat creation fails
-
-        # Save user message and assistant message to chat history
-        if chat_id:
-            try:
-                # Save user message
-                create_message(chat_id, 'user', question)
-                log_debug(f"Saved user message to chat {chat_id}")
-
-                # Store the full response array as JSON for proper frontend rendering
-                response_json = json.dumps({
-                    'response': result.get('response', [])
-                }, ensure_ascii=False)
-
-                # Save assistant message with full response array
-                create_message(
-                    chat_id,
-                    'assistant',
-                    response_json,
-                    model_used=result.get('model_used', model),
-                    primary_source=result.get('sources', [{}])[0] if result.get('sources') else None
-                )
-                log_debug(f"Saved assistant message to chat {chat_id}")
-            except Exception as msg_error:
-                log_error(f"Failed to save messages: {str(msg_error)}")
-                # Continue even if message save fails
-
-        # Deduct credits using ENV variable
+            # Save user message
+            create_message(chat_id, 'user', question)
+            log_debug("Saved user message to chat %s", chat_id)
+
+            # Save assistant message with full response array as JSON for proper frontend rendering
+            create_message(
+                chat_id,
+                'assistant',
+                answer_json,
+                model_used=model_used,
+                primary_source=primary_source
+            )
+            log_debug("Saved assistant message to chat %s", chat_id)
+        except Exception as msg_error:
+            log_error(f"Failed to save messages: {str(msg_error)}")
+            # Continue even if message save fails
+
+    # Deduct credits
+    try:
+        credits_left = update_credits(username, -credits_cost)
+        log_info("Credits deducted (%s). User %s has %s credits remaining", credits_cost, user_id, credits_left)
+    except Exception as credit_error:
+        log_error(f"Failed to update credits for user {user_id}: {str(credit_error)}")
+
+
+def _complete_query(user_id, query, result):
+    """Collect the new chat if any, queue history/credit writes and build the response payload"""
+    question, chat_id, model, user = query['question'], query['chat_id'], query['model'], query['user']
+
+    # Pick up the chat started alongside generation (only if chat_id not provided)
+    chat_future = query.pop('chat_future', None)
+    if chat_future:
         try:
-            credits_cost = int(os.getenv('CREDITS_PER_QUERY', 1))
-            credits_left = update_credits(user['username'], -credits_cost)
-            log_info(f"Credits deducted ({credits_cost}). User {user_id} has {credits_left} credits remaining")
-        except Exception as credit_error:
-            log_error(f"Failed to update credits for user {user_id}: {str(credit_error)}")
-            # Don't fail the request if credit update fails, but log it
-            credits_left = user.get('credits', 0) - int(os.getenv('CREDITS_PER_QUERY', 1))
-
-        # Return response in JSON format that frontend can parse
-        answer_json = json.dumps({
-            'response': result.get('response', [])
-        }, ensure_ascii=False)
-
-        return jsonify({
-            'chat_id': chat_id,
-            'answer': answer_json,  # Frontend expects 'answer' field with JSON string
-            'response': result.get('response', []),  # Keep for backward compatibility
-            'sources': result.get('sources', []),
-            'model_used': result.get('model_used', model),
-            'credits_remaining': credits_left,
-            'primary_source': result.get('sources', [{}])[0] if result.get('sources') else None
-        }), 200
+            chat = chat_future.result()
+            chat_id = chat['id']
+            log_debug("Created chat %s", chat_id)
+        except Exception as chat_error:
+            log_error(f"Failed to create chat: {str(chat_error)}")
+            # Continue without saving messages if chat creation fails
+
+    response_arr = result.get('response') or []
+    sources_list = result.get('sources') or []
+    primary_source = sources_list[0] if sources_list else None
+    model_used = result.get('model_used', model)
+
+    # Serialize the response array once: stored in chat history and returned as 'answer'
+    answer_json = orjson.dumps({'response': response_arr}).decode()
+
+    # Deduct credits; the balance is reported optimistically
+    credits_cost = Config.CREDITS_PER_QUERY
+    credits_left = max(user.get('credits', 0) - credits_cost, 0)
+
+    # Messages and credits are written in the background so they don't add round trips to the response
+    persist_args = (
+        user_id, user['username'], chat_id, question, answer_json,
+        model_used, primary_source, credits_cost
+    )
+    if not _get_persist_processor().submit_task(_persist_turn, *persist_args):
+        _persist_turn(*persist_args)
+
+    # Return response in JSON format that frontend can parse
+    payload = {
+        'chat_id': chat_id,
+        'answer': answer_json,  # Frontend expects 'answer' field with JSON string
+        'response': response_arr,  # Keep for backward compatibility
+        'sources': sources_list,
+        'model_used': model_used,
+        'credits_remaining': credits_left,
+        'primary_source': primary_source
+    }
+
+    # A retry of this request_id gets the same response (and chat) without another charge
+    if query.pop('request_claimed', False):
+        get_request_store().complete((user_id, query['request_id']), payload)
+
+    return payload
+
+
+def _sse_event(event, data):
+    """Format one server-sent event with a JSON data payload"""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+@query_bp.route('/ask', methods=['POST'])
+@jwt_required()
+def ask_question():
+    """Ask question about video(s) using RAG"""
+    user_id = get_jwt_identity()
+    query = None
+
+    try:
+        query = _prepare_query(user_id, request.json)
+        previous = _claim_request(user_id, query)
+        if previous is not None:
+            return jsonify(previous), 200
+
+        _retrieve_context(user_id, query)
+        _start_chat_creation(user_id, query)
 
+        # Generate answer while the chat (if needed) is being created
+        result = query['cached_result']
+        if result is None:
+            try:
+                log_debug("Generating answer with model: %s", query['model'])
+                result = query['ai_service'].generate_answer(query['question'], query['context_chunks'], query['model'])
+            except Exception as ai_error:
+                log_error(f"AI generation failed: {str(ai_error)}", exc_info=True)
+                _discard_pending_chat(query)
+                _release_request(user_id, query)
+                return jsonify({'error': 'Failed to generate answer. Please try again.'}), 500
+
+            _cache_answer(query, result)
+
+        return jsonify(_complete_query(user_id, query, result)), 200
+
+    except QueryAbort as abort:
+        _release_request(user_id, query)
+        return jsonify(abort.payload), abort.status
     except ValueError as ve:
         log_error(f"Validation error in query: {str(ve)}")
+        _release_request(user_id, query)
         return jsonify({'error': 'Invalid request data', 'message': str(ve)}), 400
     except KeyError as ke:
         log_error(f"Missing required field: {str(ke)}")
+        _release_request(user_id, query)
         return jsonify({'error': 'Missing required field', 'message': str(ke)}), 400
     except Exception as e:
         log_error(f"Unexpected error in query endpoint: {str(e)}", exc_info=True)
+        _release_request(user_id, query)
+        return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
+
+
+@query_bp.route('/ask/stream', methods=['POST'])
+@jwt_required()
+def ask_question_stream():
+    """
+    Ask question about video(s) using RAG, streaming the answer as server-sent events.
+
+    Events: 'delta' ({'text': raw model output fragment}) while generating, 'segment' (one parsed
+    answer segment) as each one completes, then a final 'done' with the same payload /ask
+    returns, or 'error' if generation fails mid-stream.
+    Validation and retrieval errors are returned as regular JSON responses before streaming starts.
+    """
+    user_id = get_jwt_identity()
+    query = None
+
+    try:
+        query = _prepare_query(user_id, request.json)
+        previous = _claim_request(user_id, query)
+        if previous is None:
+            _retrieve_context(user_id, query)
+            _start_chat_creation(user_id, query)
+    except QueryAbort as abort:
+        _release_request(user_id, query)
+        return jsonify(abort.payload), abort.status
+    except Exception as e:
+        log_error(f"Unexpected error in streaming query endpoint: {str(e)}", exc_info=True)
+        _release_request(user_id, query)
         return jsonify({'error': 'An unexpected error occurred. Please try again later.'}), 500
+
+    @stream_with_context
+    def generate():
+        if previous is not None:
+            # Retry of an answered request_id: replay the original payload only
+            yield _sse_event('done', previous)
+            return
+
+        result = query['cached_result']
+        try:
+            if result is None:
+                log_debug("Streaming answer with model: %s", query['model'])
+                for event in query['ai_service'].generate_answer_stream(
+                        query['question'], query['context_chunks'], query['model']):
+                    if event['type'] == 'delta':
+                        yield _sse_event('delta', {'text': event['text']})
+                    elif event['type'] == 'segment':
+                        yield _sse_event('segment', event['segment'])
+                    else:
+                        result = event['result']
+
+                _cache_answer(query, result)
+
+            # Chat history and credits are only written once the full answer exists
+            yield _sse_event('done', _complete_query(user_id, query, result))
+        except GeneratorExit:
+            # Client went away before the answer finished: nothing is saved or charged
+            log_info("Client disconnected from stream for user %s", user_id)
+            _discard_pending_chat(query)
+            _release_request(user_id, query)
+            raise
+        except Exception as e:
+            log_error(f"AI streaming failed: {str(e)}", exc_info=True)
+            _discard_pending_chat(query)
+            _release_request(user_id, query)
+            yield _sse_event('error', {'error': 'Failed to generate answer. Please try again.'})
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -2,18 +2,21 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.youtube_service import YouTubeService
 from app.services.transcript_service import TranscriptService
-from app.services.pinecone_service import PineconeService
+from app.services.pinecone_service import get_pinecone_service
 from app.services.supabase_service import (
-    create_source, update_source_status,
-    get_sources_by_user, get_sources_count_by_user,
-    get_source_by_id, delete_source
+    create_source, update_source_status, set_status_if,
+    get_sources_page_by_user,
+    get_source_by_id, get_source_owner, delete_source
 )
 from app.services.background_processor import submit_background_task
-from app.utils.helpers import extract_video_id
+from app.utils.helpers import parse_youtube_url, encode_cursor, decode_cursor
 from app.utils.logger import log_info, log_error, log_debug, log_warning
 
 transcript_bp = Blueprint('transcript', __name__)
 
+# Largest number of videos processed for one source
+MAX_VIDEOS = 50
+
 
 def process_source_background(source_id, video_ids, user_id):
     """
@@ -25,77 +28,69 @@ def process_source_background(source_id, video_ids, user_id):
         video_ids: List of YouTube video IDs
         user_id: User ID who created the source
     """
-    log_info(f"[BACKGROUND] Starting processing for source {source_id}")
+    log_info("[BACKGROUND] Starting processing for source %s", source_id)
 
+    # Every path ends in exactly one status write, made in the finally block
+    status = 'failed'
     try:
         # Initialize services
-        transcript_service = TranscriptService()
-        pinecone_service = PineconeService()
+        pinecone_service = get_pinecone_service()
+
+        # Videos already embedded (one Pinecone fetch) don't need their transcripts downloaded again
+        existing = pinecone_service.get_existing_video_ids(video_ids)
+        video_ids = [video_id for video_id in video_ids if video_id not in existing]
 
         # Fetch transcripts
-        log_info(f"[BACKGROUND] Fetching transcripts for {len(video_ids)} videos")
-        transcript_results = transcript_service.fetch_multiple_transcripts(video_ids)
-        log_info(f"[BACKGROUND] Transcript fetch complete: {len(transcript_results['results'])} success, {len(transcript_results['errors'])} errors")
+        transcript_results = {'results': [], 'errors': []}
+        if video_ids:
+            log_info("[BACKGROUND] Fetching transcripts for %d videos", len(video_ids))
+            transcript_results = TranscriptService.fetch_multiple_transcripts(video_ids)
+            log_info("[BACKGROUND] Transcript fetch complete: %d success, %d errors", len(transcript_results['results']), len(transcript_results['errors']))
 
         # Check if any transcripts were successfully fetched
-        if len(transcript_results['results']) == 0:
+        if len(transcript_results['results']) == 0 and not existing:
             log_error(f"[BACKGROUND] No transcripts fetched for source {source_id}")
-            update_source_status(source_id, 'failed')
             return
 
-        # Store in Pinecone
-        log_info(f"[BACKGROUND] Starting Pinecone storage for source {source_id}")
-        storage_results = []
-        storage_errors = []
-        videos_already_exist = 0
+        # Store in Pinecone (vectors from all videos are upserted together in batches)
+        storage = {'results': [], 'errors': []}
+        if transcript_results['results']:
+            log_info("[BACKGROUND] Starting Pinecone storage for source %s", source_id)
+            storage = pinecone_service.store_transcripts_batch(
+                transcript_results['results'],
+                source_id=source_id,
+                user_id=user_id
+            )
+        storage_results = storage['results']
+        storage_errors = storage['errors']
+        videos_already_exist = len(existing) + sum(1 for result in storage_results if result['status'] == 'exists')
 
-        for transcript_data in transcript_results['results']:
-            try:
-                log_debug(f"[BACKGROUND] Storing transcript for video: {transcript_data['video_id']}")
-                result = pinecone_service.store_transcript(
-                    transcript_data['video_id'],
-                    transcript_data,
-                    source_id=source_id,
-                    user_id=user_id
-                )
-                storage_results.append(result)
-
-                # Track videos that already exist
-                if result.get('status') == 'exists':
-                    videos_already_exist += 1
-                    log_info(f"[BACKGROUND] Video {transcript_data['video_id']} already exists in vector store, reusing embeddings")
-                else:
-                    log_info(f"[BACKGROUND] Storage result for {transcript_data['video_id']}: {result.get('status', 'unknown')}")
-            except Exception as storage_error:
-                log_error(f"[BACKGROUND] Failed to store transcript for {transcript_data['video_id']}: {str(storage_error)}")
-                storage_errors.append({
-                    'video_id': transcript_data['video_id'],
-                    'error': str(storage_error)
-                })
+        for storage_error in storage_errors:
+            log_error(f"[BACKGROUND] Failed to store transcript for {storage_error['video_id']}: {storage_error['error']}")
 
         # Update status based on results
-        if len(storage_results) == 0:
+        if len(storage_results) == 0 and not existing:
             log_error(f"[BACKGROUND] No transcripts were stored for source {source_id}")
-            update_source_status(source_id, 'failed')
         else:
             if videos_already_exist > 0:
-                log_info(f"[BACKGROUND] Source {source_id}: {videos_already_exist} video(s) already existed, reusing embeddings")
+                log_info("[BACKGROUND] Source %s: %s video(s) already existed, reusing embeddings", source_id, videos_already_exist)
 
             if storage_errors or transcript_results['errors']:
-                log_warning(f"[BACKGROUND] Source {source_id} has partial errors but marking as ready")
+                log_warning("[BACKGROUND] Source %s has partial errors but marking as ready", source_id)
             else:
-                log_info(f"[BACKGROUND] Source {source_id} processed successfully")
+                log_info("[BACKGROUND] Source %s processed successfully", source_id)
 
-            update_source_status(source_id, 'ready')
+            status = 'ready'
 
-        log_info(f"[BACKGROUND] Processing complete for source {source_id}")
+        log_info("[BACKGROUND] Processing complete for source %s", source_id)
 
     except Exception as e:
         log_error(f"[BACKGROUND] Fatal error processing source {source_id}: {str(e)}", exc_info=True)
+    finally:
         try:
-            update_source_status(source_id, 'failed')
-        except:
-            pass
+            update_source_status(source_id, status)
+        except Exception as e:
+            log_error(f"[BACKGROUND] Failed to set status '{status}' for source {source_id}: {str(e)}")
 
 @transcript_bp.route('/process', methods=['POST'])
 @jwt_required()
@@ -107,7 +102,7 @@ def process_videos():
     try:
         # Validate request data
         if not request.json:
-            log_warning(f"Empty request body from user {user_id}")
+            log_warning("Empty request body from user %s", user_id)
             return jsonify({'error': 'Request body required'}), 400
 
         data = request.json
@@ -121,21 +116,20 @@ def process_videos():
 
         url = url.strip()
 
-        # Basic URL validation
-        if not ('youtube.com' in url or 'youtu.be' in url):
-            log_warning(f"Invalid YouTube URL from user {user_id}: {url}")
+        # Validate and classify the URL in one pass
+        url_type, url_id = parse_youtube_url(url)
+        if url_type is None:
+            log_warning("Invalid YouTube URL from user %s: %s", user_id, url)
             return jsonify({
                 'error': 'Invalid URL',
                 'message': 'Please provide a valid YouTube video or playlist URL'
             }), 400
 
-        log_info(f"Processing video request from user {user_id}, URL: {url}")
+        log_info("Processing video request from user %s, URL: %s", user_id, url)
 
-        # Initialize services
+        # Make sure the shared vector store client is up before creating a source for it
         try:
-            youtube_service = YouTubeService()
-            transcript_service = TranscriptService()
-            pinecone_service = PineconeService()
+            get_pinecone_service()
         except Exception as service_error:
             log_error(f"Failed to initialize services: {str(service_error)}", exc_info=True)
             return jsonify({'error': 'Service initialization failed. Please try again later.'}), 503
@@ -145,17 +139,18 @@ def process_videos():
         video_ids = []
 
         try:
-            if youtube_service.is_playlist(url):
-                video_ids = youtube_service.get_video_ids_from_playlist(url)
+            if url_type == 'playlist':
+                # One extra ID tells us whether the playlist had to be truncated
+                video_ids = YouTubeService.get_video_ids_from_playlist(url, limit=MAX_VIDEOS + 1)
                 if not video_ids or len(video_ids) == 0:
                     log_error(f"Playlist URL returned no videos: {url}")
                     return jsonify({
                         'error': 'Empty playlist',
                         'message': 'The playlist appears to be empty or inaccessible'
                     }), 400
-                log_info(f"Found playlist with {len(video_ids)} videos")
+                log_info("Found playlist with %d videos", len(video_ids))
             else:
-                video_id = extract_video_id(url)
+                video_id = url_id
                 if not video_id:
                     log_error(f"Failed to extract video ID from URL: {url}")
                     return jsonify({
@@ -163,7 +158,7 @@ def process_videos():
                         'message': 'Could not extract video ID from the provided URL'
                     }), 400
                 video_ids = [video_id]
-                log_info(f"Processing single video: {video_ids[0]}")
+                log_info("Processing single video: %s", video_ids[0])
         except Exception as extract_error:
             log_error(f"Error extracting video IDs: {str(extract_error)}", exc_info=True)
             return jsonify({
@@ -171,10 +166,15 @@ def process_videos():
                 'message': 'Could not extract video information. Please check the URL and try again.'
             }), 400
 
+        # Playlists can list the same video more than once; keep the first occurrence
+        unique_video_ids = list(dict.fromkeys(video_ids))
+        if len(unique_video_ids) < len(video_ids):
+            log_info("Deduped to %d unique video IDs", len(unique_video_ids))
+            video_ids = unique_video_ids
+
         # Limit playlist size
-        MAX_VIDEOS = 50
         if len(video_ids) > MAX_VIDEOS:
-            log_warning(f"Playlist too large ({len(video_ids)} videos), limiting to {MAX_VIDEOS}")
+            log_warning("Playlist has more than %d videos, limiting to %d", MAX_VIDEOS, MAX_VIDEOS)
             video_ids = video_ids[:MAX_VIDEOS]
             title = (title or '') + f' (First {MAX_VIDEOS} videos)'
 
@@ -182,13 +182,13 @@ def process_videos():
         if not title or not title.strip():
             log_debug("No custom title provided, fetching from YouTube")
             try:
-                metadata = youtube_service.get_video_metadata(video_ids[0])
+                metadata = YouTubeService.get_video_metadata(video_ids[0])
                 title = metadata.get('title', f'Video {video_ids[0][:8]}')
                 if len(video_ids) > 1:
                     title = f"{title} (+{len(video_ids)-1} more)"
-                log_info(f"Auto-fetched title: {title}")
+                log_info("Auto-fetched title: %s", title)
             except Exception as e:
-                log_warning(f"Failed to auto-fetch title: {str(e)}")
+                log_warning("Failed to auto-fetch title: %s", e)
                 title = f'YouTube Source ({len(video_ids)} video{"s" if len(video_ids) > 1 else ""})'
         else:
             title = title.strip()
@@ -202,7 +202,7 @@ def process_videos():
         try:
             source = create_source(user_id, video_ids, title)
             source_id = source['id']
-            log_info(f"Created source: {source_id}")
+            log_info("Created source: %s", source_id)
         except Exception as db_error:
             log_error(f"Failed to create source in database: {str(db_error)}", exc_info=True)
             return jsonify({
@@ -211,7 +211,6 @@ def process_videos():
             }), 500
 
         # ASYNC PROCESSING: Submit background task and return immediately
-        log_info(f"Submitting background task for source {source_id}")
         task_submitted = submit_background_task(
             process_source_background,
             source_id,
@@ -236,9 +235,9 @@ def process_videos():
             'message': 'Source created successfully. Processing started in background.',
             'total_videos': len(video_ids)
         }
-        log_info(f"Source created and processing started: {source_id}")
+        log_info("Source created and processing started: %s", source_id)
 
-        return jsonify(response_data), 200
+        return jsonify(response_data), 202
 
     except ValueError as ve:
         log_error(f"Validation error: {str(ve)}")
@@ -260,13 +259,17 @@ def process_videos():
 @transcript_bp.route('/sources', methods=['GET'])
 @jwt_required()
 def get_all_sources():
-    """Get all sources for current user with pagination"""
+    """
+    Get all sources for current user with pagination
+    Query params: ?limit=20&before=<next_cursor of the previous page> (or &page=1 for numbered pages with a total)
+    """
     user_id = get_jwt_identity()
 
     try:
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 20, type=int)
+        cursor = request.args.get('before')
 
         # Validate pagination parameters
         if page < 1:
@@ -276,35 +279,39 @@ def get_all_sources():
         elif limit > 100:
             limit = 100
 
-        # Calculate offset
-        offset = (page - 1) * limit
-
-        # Get paginated sources
-        sources = get_sources_by_user(user_id, limit=limit, offset=offset)
-        total_count = get_sources_count_by_user(user_id)
+        # Keyset cursor from a previous page's next_cursor (no OFFSET scan, no COUNT)
+        before = None
+        if cursor:
+            try:
+                before = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
 
-        # Calculate total pages
-        total_pages = (total_count + limit - 1) // limit if total_count > 0 else 0
+        # Get paginated sources and (in page mode) the total count in one round trip
+        page_result = get_sources_page_by_user(user_id, limit=limit, offset=(page - 1) * limit, before=before)
+        sources = page_result['sources']
 
-        # Format for frontend
-        formatted_sources = []
-        for source in sources:
-            formatted_sources.append({
-                'id': source['id'],
-                'title': source['title'],
-                'video_ids': source['video_ids'],
-                'status': source['status'],
-                'created_at': source['created_at']
-            })
+        next_cursor = None
+        if len(sources) == limit:
+            last_source = sources[-1]
+            next_cursor = encode_cursor(last_source['created_at'], last_source['id'])
 
-        return jsonify({
-            'sources': formatted_sources,
-            'pagination': {
+        if before:
+            pagination = {'limit': limit, 'next_cursor': next_cursor}
+        else:
+            total_count = page_result['total']
+            pagination = {
                 'page': page,
                 'limit': limit,
                 'total': total_count,
-                'pages': total_pages
+                'pages': (total_count + limit - 1) // limit if total_count > 0 else 0,
+                'next_cursor': next_cursor
             }
+
+        # Rows already carry exactly the columns the frontend needs (projected in the query)
+        return jsonify({
+            'sources': sources,
+            'pagination': pagination
         }), 200
 
     except Exception as e:
@@ -344,13 +351,14 @@ def delete_source_route(source_id):
     user_id = get_jwt_identity()
     
     try:
-        source = get_source_by_id(source_id)
+        # Only the owner is needed here, usually already known from listing the sources
+        owner = get_source_owner(source_id)
         
-        if not source:
+        if not owner:
             return jsonify({'error': 'Source not found'}), 404
         
         # Check ownership
-        if source['user_id'] != user_id:
+        if owner != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
         delete_source(source_id)
@@ -367,49 +375,39 @@ def retry_source(source_id):
     user_id = get_jwt_identity()
     
     try:
-        source = get_source_by_id(source_id)
+        owner = get_source_owner(source_id)
         
-        if not source:
+        if not owner:
             return jsonify({'error': 'Source not found'}), 404
         
-        if source['user_id'] != user_id:
+        if owner != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        if source['status'] != 'failed':
-            return jsonify({'error': 'Only failed sources can be retried'}), 400
-        
-        # Update status to processing
-        update_source_status(source_id, 'processing')
-        
-        # Re-process videos
-        video_ids = source['video_ids']
+        # Flip failed -> processing and read the source back in one UPDATE
+        source = set_status_if(source_id, 'failed', 'processing')
         
-        transcript_service = TranscriptService()
-        pinecone_service = PineconeService()
-        
-        transcript_results = transcript_service.fetch_multiple_transcripts(video_ids)
+        if not source:
+            return jsonify({'error': 'Only failed sources can be retried'}), 400
         
-        storage_results = []
-        for transcript_data in transcript_results['results']:
-            result = pinecone_service.store_transcript(
-                transcript_data['video_id'],
-                transcript_data,
-                source_id=source_id,
-                user_id=user_id
-            )
-            storage_results.append(result)
+        # Re-process in the background like a new source; clients poll the source status
+        task_submitted = submit_background_task(
+            process_source_background,
+            source_id,
+            source['video_ids'],
+            user_id
+        )
         
-        # Update status
-        if transcript_results['errors']:
+        if not task_submitted:
+            log_error(f"Failed to submit retry task for source {source_id}")
             update_source_status(source_id, 'failed')
-        else:
-            update_source_status(source_id, 'ready')
+            return jsonify({'error': 'Failed to start background processing. Please try again.'}), 500
         
         return jsonify({
             'success': True,
-            'processed': len(transcript_results['results']),
-            'errors': transcript_results['errors']
-        }), 200
+            'source_id': source_id,
+            'status': 'processing',
+            'message': 'Retry started in background.'
+        }), 202
         
     except Exception as e:
         log_error(f"Error retrying source: {str(e)}")
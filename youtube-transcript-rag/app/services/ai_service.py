@@ -1,11 +1,116 @@
+import httpx
 from openai import OpenAI
+from cachetools import TTLCache
 from config.settings import Config
+from app.services.background_processor import BackgroundProcessor
+from app.services.disk_cache import DiskCache, get_disk_cache
 from app.utils.logger import log_info, log_error, log_warning, log_debug
-import json
+import functools
+import hashlib
+import orjson
 import os
-import re
+import string
+import threading
 from datetime import datetime
 
+# Generated answers keyed by (model, normalized question, context fingerprint), so asking
+# the same question over the same retrieved chunks skips OpenRouter
+_answer_cache = TTLCache(maxsize=Config.ANSWER_CACHE_SIZE, ttl=Config.ANSWER_CACHE_TTL)
+_answer_cache_lock = threading.Lock()
+
+# Single worker that appends to ai_responses.json, so file I/O stays off the request path
+# and entries keep their order
+_log_writer = None
+_log_writer_lock = threading.Lock()
+
+
+def _answer_cache_key(model, query, context_chunks):
+    """Answer cache key: model, case/whitespace-normalized question and the ids of the context chunks"""
+    fingerprint = hashlib.blake2b(digest_size=16)
+    for chunk in context_chunks:
+        metadata = chunk['metadata']
+        fingerprint.update(f"{metadata['video_id']}:{int(metadata['start_time'])}\n".encode())
+    return model, ' '.join(query.lower().split()), fingerprint.hexdigest()
+
+
+def _create_http_client():
+    """Pooled HTTP client for OpenRouter, using HTTP/2 when enabled and h2 is installed"""
+    limits = httpx.Limits(
+        max_connections=Config.OPENROUTER_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.OPENROUTER_MAX_CONNECTIONS
+    )
+    if Config.OPENROUTER_HTTP2:
+        try:
+            return httpx.Client(http2=True, limits=limits, follow_redirects=True)
+        except ImportError as e:
+            log_warning(f"HTTP/2 unavailable for OpenRouter, using HTTP/1.1: {str(e)}")
+    return httpx.Client(limits=limits, follow_redirects=True)
+
+
+def _get_cached_answer(cache_key):
+    """Get a cached answer, or None"""
+    with _answer_cache_lock:
+        return _answer_cache.get(cache_key)
+
+
+@functools.lru_cache(maxsize=8)
+def _compile_template(template):
+    """Parse a prompt template once into (literal, field name) pairs; only plain {name} fields are supported"""
+    parts = []
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported prompt template field: {{{field}!{conversion}:{format_spec}}}")
+        parts.append((literal, field))
+    return tuple(parts)
+
+
+def _render_template(template, **values):
+    """Fill a prompt template like str.format without re-parsing it on every call"""
+    return ''.join([literal + (values[field] if field is not None else '') for literal, field in _compile_template(template)])
+
+
+def _get_log_writer():
+    """Get or create the background writer for the AI responses log"""
+    global _log_writer
+
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                writer = BackgroundProcessor(num_workers=1)
+                writer.start()
+                _log_writer = writer
+
+    return _log_writer
+
+
+def _write_ai_response_log(path, log_entry):
+    """Append one entry to the AI responses log file"""
+    try:
+        with open(path, 'ab') as f:
+            f.write(orjson.dumps(log_entry) + b'\n' + b'-' * 100 + b'\n')
+    except Exception as e:
+        log_error(f"Failed to write AI response to log file: {e}")
+
+
+def _get_disk_answer(model, messages):
+    """Look up an answer for the exact prompt on disk; returns (disk key or None when disabled, answer or None)"""
+    disk_cache = get_disk_cache()
+    if not disk_cache:
+        return None, None
+
+    disk_key = DiskCache.make_key(model, messages)
+    return disk_key, disk_cache.get(disk_key)
+
+
+def _cache_answer(cache_key, result, disk_key=None):
+    """Remember a generated answer (also on disk when a disk key is given)"""
+    with _answer_cache_lock:
+        _answer_cache[cache_key] = result
+
+    if disk_key:
+        get_disk_cache().set(disk_key, result)
+
+
 def load_prompts():
     """Load prompts from JSON configuration file"""
     prompts_path = os.getenv('PROMPTS_CONFIG_PATH', 'config/prompts.json')
@@ -16,8 +121,8 @@ def load_prompts():
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         full_path = os.path.join(base_dir, prompts_path)
 
-        with open(full_path, 'r') as f:
-            prompts = json.load(f)
+        with open(full_path, 'rb') as f:
+            prompts = orjson.loads(f.read())
             log_info(f"Loaded prompts from {prompts_path}")
             return prompts
     except Exception as e:
@@ -32,6 +137,47 @@ def load_prompts():
             "temperature": 0.7
         }
 
+class _SegmentScanner:
+    """Pulls complete segment objects out of a streamed {"response": [{...}, ...]} answer as they close"""
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._current = None  # characters of the segment object being read
+
+    def feed(self, text):
+        """Consume a content fragment and return the segments it completed"""
+        segments = []
+        for char in text:
+            if self._current is not None:
+                self._current.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+                # Depth 1 is the answer object, 2 the response array, 3 a segment
+                if char == '{' and self._depth == 3:
+                    self._current = [char]
+            elif char in '}]':
+                if char == '}' and self._depth == 3 and self._current is not None:
+                    try:
+                        segments.append(orjson.loads(''.join(self._current)))
+                    except ValueError:
+                        pass
+                    self._current = None
+                self._depth -= 1
+        return segments
+
+
 class AIService:
     def __init__(self):
         if not Config.OPENROUTER_API_KEY:
@@ -59,6 +205,8 @@ class AIService:
         self.client = OpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=Config.OPENROUTER_API_KEY,
+            http_client=_create_http_client(),
+            max_retries=Config.OPENROUTER_MAX_RETRIES,
             default_headers={
                 "HTTP-Referer": "https://github.com/pokharnajay/project-krimson",
                 "X-Title": "YouTube RAG Application"
@@ -93,93 +241,216 @@ class AIService:
         if not self.ai_responses_log:
             return
 
-        try:
-            timestamp = datetime.now().isoformat()
-
-            log_entry = {
-                'timestamp': timestamp,
-                'model': model,
-                'query': query,
-                'raw_response': raw_response,
-                'parsed_response': parsed_response,
-                'error': error
-            }
+        timestamp = datetime.now().isoformat()
 
-            # Append to log file
-            with open(self.ai_responses_log, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
-                f.write('-' * 100 + '\n')
-        except Exception as e:
-            log_error(f"Failed to write AI response to log file: {e}")
+        log_entry = {
+            'timestamp': timestamp,
+            'model': model,
+            'query': query,
+            'raw_response': raw_response,
+            'parsed_response': parsed_response,
+            'error': error
+        }
+
+        # Append to log file in the background (inline if the writer isn't running)
+        if not _get_log_writer().submit_task(_write_ai_response_log, self.ai_responses_log, log_entry):
+            _write_ai_response_log(self.ai_responses_log, log_entry)
     
+    @staticmethod
+    def _select_context(context_chunks):
+        """Drop weak matches and keep the best-scoring chunks within the context budget, in retrieval order"""
+        min_score, budget = Config.MIN_CHUNK_SCORE, Config.MAX_CONTEXT_CHARS
+        if not min_score and not budget:
+            return context_chunks
+
+        ranked = sorted(range(len(context_chunks)), key=lambda i: context_chunks[i].get('score') or 0, reverse=True)
+        keep = set()
+        used = 0
+        for i in ranked:
+            chunk = context_chunks[i]
+            score = chunk.get('score')
+            length = len(chunk['metadata']['text'])
+            # The best chunk is always kept so the model never gets an empty context
+            if keep and ((min_score and score is not None and score < min_score) or (budget and used + length > budget)):
+                continue
+            keep.add(i)
+            used += length
+
+        if len(keep) < len(context_chunks):
+            log_debug("Trimmed context from %d to %d chunks (%d chars)", len(context_chunks), len(keep), used)
+        return [chunk for i, chunk in enumerate(context_chunks) if i in keep]
+
+    def _build_messages(self, query, context_chunks):
+        """Build chat messages and the citation sources map for a query"""
+        context_chunks = self._select_context(context_chunks)
+
+        # Single pass over the chunks: group them by video for the prompt and
+        # build the sources map for citation resolution
+        videos = {}
+        sources_map = {}
+        for chunk in context_chunks:
+            metadata = chunk['metadata']
+            video_id = metadata['video_id']
+            start_time = int(metadata['start_time'])
+            videos.setdefault(video_id, []).append((start_time, metadata['text']))
+
+            key = f"{video_id}:{start_time}"
+            if key not in sources_map:
+                sources_map[key] = {
+                    'video_id': video_id,
+                    'start_time': start_time,
+                    'end_time': int(metadata['end_time']),
+                    'text': metadata['text'][:300],
+                    'youtube_link': f"https://www.youtube.com/watch?v={video_id}&t={start_time}s"
+                }
+
+        # Format context grouped by video and chronologically ordered
+        context_text = self._format_context_grouped(videos)
+
+        # Create prompt using loaded configuration
+        user_prompt = _render_template(
+            self.prompts['user_prompt_template'],
+            context=context_text,
+            query=query
+        )
+
+        messages = [
+            {"role": "system", "content": self.prompts['system_prompt']},
+            {"role": "user", "content": user_prompt}
+        ]
+        return messages, sources_map
+
+    def _create_completion(self, model, messages, stream=False):
+        """Call the chat completions API in JSON mode"""
+        log_debug("Calling AI with JSON mode, max_tokens=%s, stream=%s", self.prompts.get('max_tokens', 2000), stream)
+
+        return self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=self.prompts.get('max_tokens', 2000),
+            temperature=self.prompts.get('temperature', 0.7),
+            response_format={"type": "json_object"},
+            stream=stream
+        )
+
+    def _finish_answer(self, query, answer_raw, sources_map, model):
+        """Parse a raw AI answer, log it and shape the result returned to routes"""
+        log_debug("Received AI response: %d characters", len(answer_raw))
+
+        # Parse the new response format
+        result = self._parse_response_segments(answer_raw, sources_map)
+
+        # Log the AI response to external file
+        self._log_ai_response(
+            query=query,
+            raw_response=answer_raw,
+            model=model,
+            parsed_response=result
+        )
+
+        return {
+            'response': result['response'],
+            'sources': result['all_sources'],
+            'model_used': model
+        }
+
     def generate_answer(self, query, context_chunks, model=None):
         """Generate answer with text segments and associated timestamps/video_ids"""
         model = model or Config.OPENROUTER_MODEL
-        log_info(f"Generating structured answer using model: {model}")
+        log_info("Generating structured answer using model: %s", model)
 
         try:
-            # Format context grouped by video and chronologically ordered
-            context_text = self._format_context_grouped(context_chunks)
-
-            # Build sources map for citation resolution
-            sources_map = {}
-            for chunk in context_chunks:
-                video_id = chunk['metadata']['video_id']
-                start_time = int(chunk['metadata']['start_time'])
-                key = f"{video_id}:{start_time}"
-
-                if key not in sources_map:
-                    sources_map[key] = {
-                        'video_id': video_id,
-                        'start_time': start_time,
-                        'end_time': int(chunk['metadata']['end_time']),
-                        'text': chunk['metadata']['text'][:300],
-                        'youtube_link': f"https://www.youtube.com/watch?v={video_id}&t={start_time}s"
-                    }
+            cache_key = _answer_cache_key(model, query, context_chunks)
+            cached = _get_cached_answer(cache_key)
+            if cached is not None:
+                log_info("Reusing cached answer for identical question and context")
+                return cached
 
-            # Create prompt using loaded configuration
-            user_prompt = self.prompts['user_prompt_template'].format(
-                context=context_text,
-                query=query
-            )
+            messages, sources_map = self._build_messages(query, context_chunks)
 
-            log_debug(f"Calling AI with JSON mode, max_tokens={self.prompts.get('max_tokens', 2000)}")
+            disk_key, cached = _get_disk_answer(model, messages)
+            if cached is not None:
+                log_info("Reusing answer from disk cache")
+                _cache_answer(cache_key, cached)
+                return cached
 
             # Call AI with JSON mode
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": self.prompts['system_prompt']},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=self.prompts.get('max_tokens', 2000),
-                temperature=self.prompts.get('temperature', 0.7),
-                response_format={"type": "json_object"}
-            )
+            response = self._create_completion(model, messages)
 
             answer_raw = response.choices[0].message.content
-            log_debug(f"Received AI response: {len(answer_raw)} characters")
+            result = self._finish_answer(query, answer_raw, sources_map, model)
+            _cache_answer(cache_key, result, disk_key)
+            return result
 
-            # Parse the new response format
-            result = self._parse_response_segments(answer_raw, sources_map)
-
-            # Log the AI response to external file
+        except Exception as e:
+            log_error(f"AI generation failed: {str(e)}")
+            # Log the error as well
             self._log_ai_response(
                 query=query,
-                raw_response=answer_raw,
+                raw_response=None,
                 model=model,
-                parsed_response=result
+                error=str(e)
             )
+            raise Exception(f"Failed to generate answer: {str(e)}")
 
-            return {
-                'response': result['response'],
-                'sources': result['all_sources'],
-                'model_used': model
-            }
+    def generate_answer_stream(self, query, context_chunks, model=None):
+        """
+        Generate answer as a stream.
+
+        Yields:
+            {'type': 'delta', 'text': '...'} for each raw content fragment as it arrives,
+            {'type': 'segment', 'segment': {...}} as each answer segment is completed,
+            then {'type': 'result', 'result': {...}} shaped like generate_answer's return value
+        """
+        model = model or Config.OPENROUTER_MODEL
+        log_info("Streaming structured answer using model: %s", model)
+
+        try:
+            cache_key = _answer_cache_key(model, query, context_chunks)
+            cached = _get_cached_answer(cache_key)
+            if cached is not None:
+                log_info("Reusing cached answer for identical question and context")
+                yield {'type': 'result', 'result': cached}
+                return
+
+            messages, sources_map = self._build_messages(query, context_chunks)
+
+            disk_key, cached = _get_disk_answer(model, messages)
+            if cached is not None:
+                log_info("Reusing answer from disk cache")
+                _cache_answer(cache_key, cached)
+                yield {'type': 'result', 'result': cached}
+                return
+
+            # Call AI with JSON mode, streaming tokens back as they are generated
+            stream = self._create_completion(model, messages, stream=True)
+
+            parts = []
+            scanner = _SegmentScanner()
+            try:
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield {'type': 'delta', 'text': delta}
+                        for segment in scanner.feed(delta):
+                            processed = self._process_segment(segment, sources_map)
+                            if processed:
+                                yield {'type': 'segment', 'segment': processed}
+            finally:
+                # Also runs when the consumer stops early (client disconnected), so generation
+                # is cut off upstream instead of finishing into a dropped connection
+                stream.close()
+
+            answer_raw = ''.join(parts)
+            result = self._finish_answer(query, answer_raw, sources_map, model)
+            _cache_answer(cache_key, result, disk_key)
+            yield {'type': 'result', 'result': result}
 
         except Exception as e:
-            log_error(f"AI generation failed: {str(e)}")
-            # Log the error as well
+            log_error(f"AI streaming generation failed: {str(e)}")
             self._log_ai_response(
                 query=query,
                 raw_response=None,
@@ -188,28 +459,43 @@ class AIService:
             )
             raise Exception(f"Failed to generate answer: {str(e)}")
 
-    def _format_context_grouped(self, context_chunks):
-        """Format context chunks grouped by video and chronologically ordered"""
-        # Group by video_id
-        videos = {}
-        for chunk in context_chunks:
-            video_id = chunk['metadata']['video_id']
-            if video_id not in videos:
-                videos[video_id] = []
-            videos[video_id].append(chunk)
-
-        # Format output
-        context_text = ""
-        video_num = 1
-        for video_id, chunks in videos.items():
-            context_text += f"\n=== Video {video_num}: {video_id} ===\n"
-            for i, chunk in enumerate(chunks, 1):
-                start_time = int(chunk['metadata']['start_time'])
-                text = chunk['metadata']['text']
-                context_text += f"\n[Timestamp: {start_time}s]\n{text}\n"
-            video_num += 1
-
-        return context_text
+    def _format_context_grouped(self, videos):
+        """Format {video_id: [(start_time, text), ...]} into the prompt context, one section per video"""
+        parts = []
+        for video_num, (video_id, excerpts) in enumerate(videos.items(), 1):
+            parts.append(f"\n=== Video {video_num}: {video_id} ===\n")
+            for start_time, text in excerpts:
+                parts.append(f"\n[Timestamp: {start_time}s]\n{text}\n")
+
+        return ''.join(parts)
+
+    def _process_segment(self, segment, sources_map):
+        """Shape one AI response segment, adding its youtube_link (None if the segment has no text)"""
+        text = segment.get('text', '')
+        timestamp = segment.get('timestamp')
+        video_id = segment.get('video_id')
+
+        # Validate segment
+        if not text:
+            log_warning("Skipping segment with empty text: %s", segment)
+            return None
+
+        # Create processed segment
+        processed_segment = {
+            'text': text,
+            'timestamp': timestamp,
+            'video_id': video_id
+        }
+
+        # Add youtube_link for convenience when we have valid source info
+        if video_id and timestamp is not None:
+            key = f"{video_id}:{timestamp}"
+            if key in sources_map:
+                processed_segment['youtube_link'] = sources_map[key]['youtube_link']
+            else:
+                processed_segment['youtube_link'] = f"https://www.youtube.com/watch?v={video_id}&t={timestamp}s"
+
+        return processed_segment
 
     def _parse_response_segments(self, ai_response, sources_map):
         """
@@ -227,17 +513,10 @@ class AIService:
         """
         try:
             # Clean up the response if it's wrapped in markdown code blocks
-            cleaned_response = ai_response.strip()
-            if cleaned_response.startswith('```json'):
-                cleaned_response = cleaned_response[7:]
-            if cleaned_response.startswith('```'):
-                cleaned_response = cleaned_response[3:]
-            if cleaned_response.endswith('```'):
-                cleaned_response = cleaned_response[:-3]
-            cleaned_response = cleaned_response.strip()
+            cleaned_response = ai_response.strip().removeprefix('```json').removeprefix('```').removesuffix('```').strip()
 
             # Parse JSON
-            response_json = json.loads(cleaned_response)
+            response_json = orjson.loads(cleaned_response)
             response_segments = response_json.get('response', [])
 
             if not response_segments:
@@ -251,66 +530,45 @@ class AIService:
 
             # Process each segment to enrich with full source info
             processed_segments = []
-            used_sources = set()
+            # Sources are collected in the same pass, in the order the answer first cites them
+            used_sources = {}
 
             for segment in response_segments:
-                text = segment.get('text', '')
-                timestamp = segment.get('timestamp')
-                video_id = segment.get('video_id')
-
-                # Validate segment
-                if not text:
-                    log_warning(f"Skipping segment with empty text: {segment}")
+                processed_segment = self._process_segment(segment, sources_map)
+                if not processed_segment:
                     continue
-
-                # Create processed segment
-                processed_segment = {
-                    'text': text,
-                    'timestamp': timestamp,
-                    'video_id': video_id
-                }
-
-                # If we have valid source info, track it
-                if video_id and timestamp is not None:
-                    key = f"{video_id}:{timestamp}"
-                    used_sources.add(key)
-
-                    # Add youtube_link for convenience
-                    if key in sources_map:
-                        processed_segment['youtube_link'] = sources_map[key]['youtube_link']
-                    else:
-                        processed_segment['youtube_link'] = f"https://www.youtube.com/watch?v={video_id}&t={timestamp}s"
-
                 processed_segments.append(processed_segment)
 
-            # Get all unique sources used
-            all_sources = []
-            for key in used_sources:
-                if key in sources_map:
-                    all_sources.append(sources_map[key])
-                else:
+                # If we have valid source info, track it
+                if 'youtube_link' not in processed_segment:
+                    continue
+                video_id, timestamp = processed_segment['video_id'], processed_segment['timestamp']
+                key = f"{video_id}:{timestamp}"
+                if key not in used_sources:
                     # Create minimal source if not in map
-                    video_id, timestamp = key.split(':')
-                    all_sources.append({
+                    used_sources[key] = sources_map.get(key) or {
                         'video_id': video_id,
-                        'start_time': int(timestamp),
-                        'youtube_link': f"https://www.youtube.com/watch?v={video_id}&t={timestamp}s"
-                    })
+                        'start_time': int(float(timestamp)),
+                        'youtube_link': processed_segment['youtube_link']
+                    }
+
+            # Get all unique sources used
+            all_sources = list(used_sources.values())
 
             # If no sources were used, add all available sources as fallback
             if not all_sources:
                 all_sources = list(sources_map.values())
 
-            log_info(f"Parsed {len(processed_segments)} response segments with {len(all_sources)} unique sources")
+            log_info("Parsed %d response segments with %d unique sources", len(processed_segments), len(all_sources))
 
             return {
                 'response': processed_segments,
                 'all_sources': all_sources
             }
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             log_error(f"Failed to parse AI JSON response: {e}")
-            log_debug(f"Raw response: {ai_response[:500]}...")
+            log_debug("Raw response: %.500s...", ai_response)
 
             # Fallback: treat as plain text
             return {
@@ -331,3 +589,20 @@ class AIService:
                 }],
                 'all_sources': list(sources_map.values())
             }
+
+
+# Global service instance (singleton pattern)
+_ai_service = None
+_ai_service_lock = threading.Lock()
+
+
+def get_ai_service():
+    """Get or create the shared AIService (OpenRouter client and prompts load once per process)"""
+    global _ai_service
+
+    if _ai_service is None:
+        with _ai_service_lock:
+            if _ai_service is None:
+                _ai_service = AIService()
+
+    return _ai_service
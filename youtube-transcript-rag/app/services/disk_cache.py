@@ -0,0 +1,139 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import orjson
+from config.settings import Config
+from app.utils.logger import log_debug, log_warning
+
+# Global cache instance (singleton pattern)
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+class DiskCache:
+    """
+    Generated answers stored as JSON files keyed by a hash of the full prompt.
+
+    Unlike the in-memory caches this survives restarts and is shared by every worker
+    (or container) that mounts the same directory. Expired files are deleted when read,
+    and writes start a background sweep (at most once per sweep_interval) that removes
+    expired files and the oldest ones beyond max_files.
+    """
+
+    def __init__(self, cache_dir, ttl, max_files=10000, sweep_interval=600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_files = max_files
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0
+        self._sweep_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model, messages):
+        """Hash the model and every prompt message into a cache key"""
+        digest = hashlib.sha256(model.encode())
+        for message in messages:
+            digest.update(b'\x00' + message['content'].encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key[2:] + '.json')
+
+    def get(self, key):
+        """Get a cached value, or None if missing, expired or unreadable"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        """Store a value; the file is written aside and renamed so readers never see partial JSON"""
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(value))
+            os.replace(tmp_path, path)
+            log_debug("Stored answer in disk cache: %s", key)
+        except (OSError, TypeError) as e:
+            log_warning(f"Failed to write disk cache entry {key}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._maybe_sweep()
+
+    def _maybe_sweep(self):
+        """Start a background sweep unless one ran within sweep_interval or is still running"""
+        now = time.monotonic()
+        if now < self._next_sweep or not self._sweep_lock.acquire(blocking=False):
+            return
+        self._next_sweep = now + self.sweep_interval
+        threading.Thread(target=self._run_sweep, name='disk-cache-sweep', daemon=True).start()
+
+    def _run_sweep(self):
+        try:
+            self.sweep()
+        except Exception as e:
+            log_warning(f"Disk cache sweep failed: {str(e)}")
+        finally:
+            self._sweep_lock.release()
+
+    def sweep(self):
+        """Delete expired files (including abandoned temp files), then the oldest entries beyond max_files"""
+        now = time.time()
+        entries = []
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    mtime = os.path.getmtime(path)
+                    if now - mtime > self.ttl:
+                        os.remove(path)
+                        removed += 1
+                    elif name.endswith('.json'):
+                        entries.append((mtime, path))
+                except OSError:
+                    # Removed concurrently by another worker
+                    continue
+
+        if len(entries) > self.max_files:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_files]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+
+        if removed:
+            log_debug("Disk cache sweep removed %d files", removed)
+        return removed
+
+
+def get_disk_cache():
+    """Get or create the shared disk cache (None when RESPONSE_CACHE_DIR is not set)"""
+    global _disk_cache
+
+    if not Config.RESPONSE_CACHE_DIR:
+        return None
+
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                _disk_cache = DiskCache(
+                    Config.RESPONSE_CACHE_DIR,
+                    ttl=Config.ANSWER_CACHE_TTL,
+                    max_files=Config.RESPONSE_CACHE_MAX_FILES
+                )
+
+    return _disk_cache
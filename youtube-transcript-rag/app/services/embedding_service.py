@@ -1,12 +1,20 @@
-from sentence_transformers import SentenceTransformer
+import hashlib
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+from cachetools import LRUCache
 from config.settings import Config
 from app.utils.logger import log_info, log_error, log_debug
-import torch
 
 # Global model instance (singleton pattern)
 _embedding_model = None
 _device = None
 
+# Chunk embeddings keyed by sha256 of the text, so re-processed sources and
+# transcripts shared between videos don't pay for the model again
+_embedding_cache = LRUCache(maxsize=Config.EMBEDDING_CACHE_SIZE)
+_embedding_cache_lock = threading.Lock()
+
 
 def get_embedding_model():
     """
@@ -18,6 +26,10 @@ def get_embedding_model():
     global _embedding_model, _device
 
     if _embedding_model is None:
+        # Imported here so torch/transformers only load when embeddings are first needed
+        import torch
+        from sentence_transformers import SentenceTransformer
+
         log_debug("Initializing EmbeddingService with sentence-transformers")
 
         # Check GPU availability
@@ -40,52 +52,69 @@ class EmbeddingService:
     
     def create_embeddings(self, texts):
         """Create embeddings for list of texts using sentence-transformers"""
-        log_info(f"Creating embeddings for {len(texts)} texts")
+        log_info("Creating embeddings for %d texts", len(texts))
         try:
-            # Generate embeddings (automatically uses GPU if available)
-            embeddings = self.model.encode(
-                texts, 
-                convert_to_numpy=True,
-                show_progress_bar=False  # Optional: disable progress bar in production
-            )
-            log_info(f"✓ Successfully created {len(embeddings)} embeddings")
-            return embeddings.tolist()
+            keys = [hashlib.sha256(text.encode('utf-8')).digest() for text in texts]
+            with _embedding_cache_lock:
+                embeddings = [_embedding_cache.get(key) for key in keys]
+
+            # Only texts not seen before go through the model
+            misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if misses:
+                # Generate embeddings (automatically uses GPU if available)
+                encoded = self.model.encode(
+                    [texts[i] for i in misses],
+                    batch_size=Config.EMBEDDING_BATCH_SIZE,
+                    convert_to_numpy=True,
+                    show_progress_bar=False  # Optional: disable progress bar in production
+                )
+
+                # Cached as float32 rows (~1.5 KB each); Python lists would be ~8x larger.
+                # Rows are copied so a cached entry doesn't keep the whole encoded batch alive
+                with _embedding_cache_lock:
+                    for i, embedding in zip(misses, encoded):
+                        embeddings[i] = embedding
+                        _embedding_cache[keys[i]] = embedding.copy()
+
+            log_info("✓ Successfully created %d embeddings (%d from cache)", len(embeddings), len(texts) - len(misses))
+            return [embedding.tolist() for embedding in embeddings]
         except Exception as e:
             log_error(f"Embedding creation failed: {str(e)}")
             raise Exception(f"Embedding creation failed: {str(e)}")
     
+    def embed(self, text):
+        """Embed a single text (e.g. a question) and return it as a numpy vector"""
+        try:
+            return self.model.encode(text, convert_to_numpy=True, show_progress_bar=False)
+        except Exception as e:
+            log_error(f"Embedding creation failed: {str(e)}")
+            raise Exception(f"Embedding creation failed: {str(e)}")
+
     @staticmethod
     def chunk_transcript(segments, chunk_size=Config.CHUNK_SIZE):
         """Split transcript into chunks with metadata"""
-        log_debug(f"Chunking {len(segments)} segments with chunk_size={chunk_size}")
+        log_debug("Chunking %d segments with chunk_size=%s", len(segments), chunk_size)
         chunks = []
-        current_chunk = {
-            'text': '',
-            'start_time': segments[0]['start'],
-            'end_time': 0,
-            'segments': []
-        }
-        current_length = 0
-        
-        for segment in segments:
-            text = segment['text']
-            if current_length + len(text) > chunk_size and current_chunk['text']:
-                chunks.append(current_chunk)
-                current_chunk = {
-                    'text': text,
-                    'start_time': segment['start'],
-                    'end_time': segment['start'] + segment['duration'],
-                    'segments': [segment]
-                }
-                current_length = len(text)
-            else:
-                current_chunk['text'] += ' ' + text
-                current_chunk['end_time'] = segment['start'] + segment['duration']
-                current_chunk['segments'].append(segment)
-                current_length += len(text)
-        
-        if current_chunk['text']:
-            chunks.append(current_chunk)
-        
-        log_debug(f"Created {len(chunks)} chunks")
+
+        # Chunk boundaries come from a binary search over cumulative text lengths,
+        # so only chunk starts are visited in Python rather than every segment
+        texts = [segment['text'] for segment in segments]
+        ends = list(accumulate(map(len, texts)))
+
+        start = 0
+        while start < len(segments):
+            offset = ends[start] - len(texts[start])
+            end = max(bisect_right(ends, offset + chunk_size, start), start + 1)
+            chunk_segments = segments[start:end]
+            last = chunk_segments[-1]
+            text = ' '.join(texts[start:end])
+            chunks.append({
+                'text': text if chunks else ' ' + text,
+                'start_time': chunk_segments[0]['start'],
+                'end_time': last['start'] + last['duration'],
+                'segments': chunk_segments
+            })
+            start = end
+
+        log_debug("Created %d chunks", len(chunks))
         return chunks
@@ -2,12 +2,31 @@ from pinecone import Pinecone, ServerlessSpec
 from config.settings import Config
 from app.services.embedding_service import EmbeddingService
 from app.utils.logger import log_info, log_error, log_debug, log_warning
+import threading
 import time
 
+# Shared index handle (singleton pattern) so every query/upsert reuses one HTTP connection pool
+_index = None
+_index_lock = threading.Lock()
+
+
+def _create_client():
+    """Create the Pinecone client, preferring gRPC when enabled and installed"""
+    if Config.PINECONE_USE_GRPC:
+        try:
+            from pinecone.grpc import PineconeGRPC
+            return PineconeGRPC(api_key=Config.PINECONE_API_KEY), True
+        except Exception as e:
+            log_warning(f"Pinecone gRPC client unavailable, falling back to REST: {str(e)}")
+    return Pinecone(api_key=Config.PINECONE_API_KEY), False
+
+
 class PineconeService:
+    use_grpc = False
+
     def __init__(self):
         log_info("Initializing PineconeService")
-        self.pc = Pinecone(api_key=Config.PINECONE_API_KEY)
+        self.pc, self.use_grpc = _create_client()
         self.index_name = Config.PINECONE_INDEX_NAME
         self.embedding_service = EmbeddingService()
         self._ensure_index_exists()
@@ -32,8 +51,18 @@ class PineconeService:
 
     
     def get_index(self):
-        """Get Pinecone index"""
-        return self.pc.Index(self.index_name)
+        """Get Pinecone index (shared across requests and threads)"""
+        global _index
+        if _index is None:
+            with _index_lock:
+                if _index is None:
+                    if self.use_grpc:
+                        # gRPC multiplexes async_req upserts over one channel
+                        _index = self.pc.Index(self.index_name)
+                    else:
+                        # pool_threads lets async_req upserts run in parallel over the shared connection pool
+                        _index = self.pc.Index(self.index_name, pool_threads=Config.PINECONE_POOL_THREADS)
+        return _index
     
     def video_exists(self, video_id):
         """Check if video already exists in vector store"""
@@ -45,7 +74,7 @@ class PineconeService:
                 top_k=1
             )
             exists = len(results['matches']) > 0
-            log_debug(f"Video {video_id} exists in Pinecone: {exists}")
+            log_debug("Video %s exists in Pinecone: %s", video_id, exists)
             return exists
         except Exception as e:
             # Log error but don't fail silently - we'll handle this in store_transcript
@@ -53,55 +82,49 @@ class PineconeService:
             # Return False to attempt storage - Pinecone will handle duplicate prevention
             return False
     
+    def get_existing_video_ids(self, video_ids):
+        """
+        Return the subset of video_ids already in the vector store (one fetch of each video's first chunk).
+        store_transcripts_batch removes partially stored videos, so a first chunk means a complete video.
+        """
+        if not video_ids:
+            return set()
+        try:
+            response = self.get_index().fetch(ids=[f"{video_id}_0" for video_id in video_ids])
+            return {vector_id.rsplit('_', 1)[0] for vector_id in response.vectors}
+        except Exception as e:
+            # Same fallback as video_exists: attempt storage, upserts overwrite by id
+            log_error(f"Error checking existing videos in Pinecone: {str(e)}")
+            return set()
+    
     def store_transcript(self, video_id, transcript_data, source_id=None, user_id=None):
         """Store transcript chunks as vectors with source and user metadata"""
-        log_info(f"Starting to store transcript for video {video_id}")
+        log_info("Starting to store transcript for video %s", video_id)
         try:
             if self.video_exists(video_id):
-                log_info(f"Video {video_id} already exists in Pinecone, skipping")
+                log_info("Video %s already exists in Pinecone, skipping", video_id)
                 return {'status': 'exists', 'video_id': video_id}
             
             # Chunk transcript
-            log_debug(f"Chunking transcript with {len(transcript_data['segments'])} segments")
+            log_debug("Chunking transcript with %d segments", len(transcript_data['segments']))
             chunks = EmbeddingService.chunk_transcript(transcript_data['segments'])
-            log_info(f"Created {len(chunks)} chunks for video {video_id}")
+            log_info("Created %d chunks for video %s", len(chunks), video_id)
             
             # Create embeddings
             texts = [chunk['text'] for chunk in chunks]
-            log_debug(f"Creating embeddings for {len(texts)} text chunks")
+            log_debug("Creating embeddings for %d text chunks", len(texts))
             embeddings = self.embedding_service.create_embeddings(texts)
-            log_info(f"Created {len(embeddings)} embeddings")
+            log_info("Created %d embeddings", len(embeddings))
             
             # Prepare vectors for upsert
-            vectors = []
-            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                metadata = {
-                    'video_id': video_id,
-                    'text': chunk['text'][:1000],  # Limit text length
-                    'start_time': chunk['start_time'],
-                    'end_time': chunk['end_time'],
-                    'language': transcript_data['language'],
-                    'language_code': transcript_data['language_code']
-                }
-                
-                # Add source and user IDs if provided
-                if source_id:
-                    metadata['source_id'] = source_id
-                if user_id:
-                    metadata['user_id'] = user_id
-                
-                vectors.append({
-                    'id': f"{video_id}_{idx}",
-                    'values': embedding,
-                    'metadata': metadata
-                })
+            vectors = self._build_vectors(video_id, transcript_data, chunks, embeddings, source_id, user_id)
             
-            log_debug(f"Prepared {len(vectors)} vectors for upsert")
+            log_debug("Prepared %d vectors for upsert", len(vectors))
             
             # Upsert to Pinecone
             index = self.get_index()
             index.upsert(vectors=vectors)
-            log_info(f"✓ Successfully stored {len(vectors)} vectors for video {video_id}")
+            log_info("✓ Successfully stored %d vectors for video %s", len(vectors), video_id)
             
             return {'status': 'stored', 'video_id': video_id, 'chunks': len(vectors)}
             
@@ -109,18 +132,139 @@ class PineconeService:
             log_error(f"Error storing transcript for video {video_id}: {str(e)}")
             raise
     
-    def query_videos(self, query_text, video_ids=None, source_id=None, top_k=None):
-        """Query vector store with enhanced deduplication and grouping"""
-        log_info(f"Querying videos with: video_ids={video_ids}, source_id={source_id}")
+    @staticmethod
+    def _build_vectors(video_id, transcript_data, chunks, embeddings, source_id=None, user_id=None):
+        """Build upsert payloads for one video's chunks with source and user metadata"""
+        vectors = []
+        for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            metadata = {
+                'video_id': video_id,
+                'text': chunk['text'][:1000],  # Limit text length
+                'start_time': chunk['start_time'],
+                'end_time': chunk['end_time'],
+                'language': transcript_data['language'],
+                'language_code': transcript_data['language_code']
+            }
+            
+            # Add source and user IDs if provided
+            if source_id:
+                metadata['source_id'] = source_id
+            if user_id:
+                metadata['user_id'] = user_id
+            
+            vectors.append({
+                'id': f"{video_id}_{idx}",
+                'values': embedding,
+                'metadata': metadata
+            })
+        return vectors
+    
+    def store_transcripts_batch(self, transcripts, source_id=None, user_id=None):
+        """
+        Store several videos' transcripts, upserting vectors across videos in fixed-size batches.
+        
+        Returns:
+            Dict with 'results' (status per video) and 'errors' (video_id/error per failed video)
+        """
+        log_info("Starting batch storage of %d transcripts", len(transcripts))
+        results = []
+        errors = []
+        
+        existing = self.get_existing_video_ids([t['video_id'] for t in transcripts])
+        
+        # Chunk every new video first so all chunk texts can be embedded in one call
+        chunked = []
+        for transcript_data in transcripts:
+            video_id = transcript_data['video_id']
+            if video_id in existing:
+                log_info("Video %s already exists in Pinecone, skipping", video_id)
+                results.append({'status': 'exists', 'video_id': video_id})
+                continue
+            try:
+                chunks = EmbeddingService.chunk_transcript(transcript_data['segments'])
+            except Exception as e:
+                log_error(f"Error chunking transcript for video {video_id}: {str(e)}")
+                errors.append({'video_id': video_id, 'error': str(e)})
+                continue
+            chunked.append((transcript_data, chunks))
+        
+        try:
+            embeddings = self.embedding_service.create_embeddings(
+                [chunk['text'] for _, chunks in chunked for chunk in chunks]
+            ) if chunked else []
+        except Exception as e:
+            errors.extend({'video_id': t['video_id'], 'error': str(e)} for t, _ in chunked)
+            return {'results': results, 'errors': errors}
+        
+        # Vectors from all new videos go into one list; each remembers which video it came from
+        pending = []
+        chunk_counts = {}
+        offset = 0
+        for transcript_data, chunks in chunked:
+            video_id = transcript_data['video_id']
+            video_embeddings = embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+            vectors = self._build_vectors(video_id, transcript_data, chunks, video_embeddings, source_id, user_id)
+            chunk_counts[video_id] = len(vectors)
+            pending.extend((video_id, vector) for vector in vectors)
+        
+        # Upsert in batches, sent in parallel on the index's thread pool; a failed batch
+        # fails every video that had vectors in it
+        failed = {}
+        batch_size = Config.PINECONE_UPSERT_BATCH_SIZE
+        index = self.get_index()
+        upserts = []
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                upserts.append((batch, index.upsert(vectors=[vector for _, vector in batch], async_req=True)))
+            except Exception as e:
+                upserts.append((batch, e))
+        
+        for batch, request in upserts:
+            try:
+                if isinstance(request, Exception):
+                    raise request
+                # gRPC returns futures, REST returns thread pool results
+                request.result() if self.use_grpc else request.get()
+            except Exception as e:
+                log_error(f"Pinecone upsert of {len(batch)} vectors failed: {str(e)}")
+                for video_id, _ in batch:
+                    failed.setdefault(video_id, str(e))
+        
+        # Remove what did get stored for failed videos, so a retry sees them as new and stores them in full
+        if failed:
+            self._delete_vectors([f"{video_id}_{idx}" for video_id in failed for idx in range(chunk_counts[video_id])])
+        
+        for video_id, count in chunk_counts.items():
+            if video_id in failed:
+                errors.append({'video_id': video_id, 'error': failed[video_id]})
+            else:
+                results.append({'status': 'stored', 'video_id': video_id, 'chunks': count})
+        
+        log_info("✓ Batch storage complete: %d stored or existing, %d errors", len(results), len(errors))
+        return {'results': results, 'errors': errors}
+    
+    def _delete_vectors(self, ids):
+        """Delete vectors by id (Pinecone accepts at most 1000 ids per delete)"""
+        index = self.get_index()
+        for start in range(0, len(ids), 1000):
+            try:
+                index.delete(ids=ids[start:start + 1000])
+            except Exception as e:
+                log_error(f"Failed to delete {len(ids[start:start + 1000])} vectors of failed videos: {str(e)}")
+    
+    def query_videos(self, query_text, video_ids=None, source_id=None, top_k=None, query_embedding=None):
+        """Query vector store with enhanced deduplication and grouping (pass query_embedding to skip embedding query_text)"""
+        log_debug("Querying videos with: video_ids=%s, source_id=%s", video_ids, source_id)
         # Use provided top_k or config value (respect env variable)
         if top_k is None:
             top_k = Config.TOP_K_RESULTS
 
-        log_info(f"Using top_k={top_k} for vector search (Config.TOP_K_RESULTS={Config.TOP_K_RESULTS})")
-
         try:
-            # Create query embedding
-            query_embedding = self.embedding_service.create_embeddings([query_text])[0]
+            # Create query embedding unless the caller already has one
+            if query_embedding is None:
+                query_embedding = self.embedding_service.embed(query_text)
 
             # Build filter
             filter_dict = {}
@@ -129,25 +273,25 @@ class PineconeService:
             elif source_id:
                 filter_dict['source_id'] = {'$eq': source_id}
 
-            log_debug(f"Using filter: {filter_dict}")
+            log_debug("Using filter: %s", filter_dict)
 
             # Query
             index = self.get_index()
             results = index.query(
-                vector=query_embedding,
+                vector=query_embedding.tolist() if hasattr(query_embedding, 'tolist') else query_embedding,
                 filter=filter_dict if filter_dict else None,
                 top_k=top_k,
                 include_metadata=True
             )
 
-            log_info(f"Query returned {len(results['matches'])} raw results")
+            log_debug("Query returned %d raw results", len(results['matches']))
 
             # Enhanced processing: deduplicate and group
             chunks = results['matches']
             chunks = self._deduplicate_chunks(chunks)
             chunks = self._group_and_sort_chunks(chunks)
 
-            log_info(f"After deduplication and sorting: {len(chunks)} results")
+            log_debug("After deduplication and sorting: %d results", len(chunks))
             return chunks
 
         except Exception as e:
@@ -220,7 +364,7 @@ class PineconeService:
                     overlap = self._calculate_overlap(chunk, kept_chunk)
 
                     if overlap > overlap_threshold:
-                        log_debug(f"Removing chunk due to {overlap:.0%} overlap with higher-scored chunk")
+                        log_debug("Removing chunk due to %.0f%% overlap with higher-scored chunk", overlap * 100)
                         has_significant_overlap = True
                         break
 
@@ -233,7 +377,7 @@ class PineconeService:
             log_warning("Deduplication too aggressive, keeping top 3 chunks")
             deduplicated = sorted_chunks[:3]
 
-        log_info(f"Deduplicated {len(chunks)} chunks to {len(deduplicated)} chunks")
+        log_debug("Deduplicated %d chunks to %d chunks", len(chunks), len(deduplicated))
         return deduplicated
 
     def _group_and_sort_chunks(self, chunks):
@@ -273,6 +417,23 @@ class PineconeService:
         result = []
         for video_id, video_chunks in sorted_videos:
             result.extend(video_chunks)
-            log_debug(f"Video {video_id}: {len(video_chunks)} chunks sorted chronologically")
+            log_debug("Video %s: %d chunks sorted chronologically", video_id, len(video_chunks))
 
         return result
+
+
+# Global service instance (singleton pattern)
+_pinecone_service = None
+_pinecone_service_lock = threading.Lock()
+
+
+def get_pinecone_service():
+    """Get or create the shared PineconeService (index check runs once per process)"""
+    global _pinecone_service
+
+    if _pinecone_service is None:
+        with _pinecone_service_lock:
+            if _pinecone_service is None:
+                _pinecone_service = PineconeService()
+
+    return _pinecone_service
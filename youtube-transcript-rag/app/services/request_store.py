@@ -0,0 +1,98 @@
+import threading
+import orjson
+from cachetools import TTLCache
+from config.settings import Config
+from app.utils.logger import log_error
+
+# Global store instance (singleton pattern)
+_request_store = None
+_request_store_lock = threading.Lock()
+
+# Value held for a claimed request_id until its response is recorded
+PENDING = 'pending'
+
+
+class RequestStore:
+    """
+    Idempotency records for client request_ids, keyed by (user_id, request_id).
+
+    A request claims its key before any work starts; a retry with the same key gets
+    PENDING while the first attempt runs and the recorded response afterwards.
+    Records live in Redis when a URL is given, so retries landing on another Gunicorn
+    worker see them; otherwise (or while Redis is unreachable) they are per-process only.
+    """
+
+    def __init__(self, url=None, ttl=600, max_entries=4096):
+        self.ttl = ttl
+        self._redis = None
+        if url:
+            import redis
+            self._redis = redis.Redis.from_url(url)
+        self._local = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _redis_key(key):
+        user_id, request_id = key
+        return f"request:{user_id}:{request_id}"
+
+    def claim(self, key):
+        """
+        Reserve a key for a new request.
+
+        Returns:
+            None if the key was reserved, PENDING if another request holds it,
+            or the response recorded for it
+        """
+        if self._redis is not None:
+            try:
+                name = self._redis_key(key)
+                if self._redis.set(name, PENDING, nx=True, ex=self.ttl):
+                    return None
+                value = self._redis.get(name)
+                if value is None or value == PENDING.encode():
+                    return PENDING
+                return orjson.loads(value)
+            except Exception as e:
+                log_error(f"Request store unavailable, using in-process records: {str(e)}")
+
+        with self._lock:
+            if key in self._local:
+                return self._local[key]
+            self._local[key] = PENDING
+            return None
+
+    def complete(self, key, response):
+        """Record the response returned for a claimed key"""
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_key(key), orjson.dumps(response), ex=self.ttl)
+                return
+            except Exception as e:
+                log_error(f"Failed to record request {key[1]}: {str(e)}")
+
+        with self._lock:
+            self._local[key] = response
+
+    def release(self, key):
+        """Drop a claim whose request failed so the client can retry it"""
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._redis_key(key))
+            except Exception as e:
+                log_error(f"Failed to release request {key[1]}: {str(e)}")
+
+        with self._lock:
+            self._local.pop(key, None)
+
+
+def get_request_store():
+    """Get or create the shared request store"""
+    global _request_store
+
+    if _request_store is None:
+        with _request_store_lock:
+            if _request_store is None:
+                _request_store = RequestStore(url=Config.REQUEST_STORE_URL, ttl=Config.REQUEST_ID_TTL)
+
+    return _request_store
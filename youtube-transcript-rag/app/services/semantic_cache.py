@@ -0,0 +1,108 @@
+import threading
+import time
+import numpy as np
+from cachetools import TTLCache
+from config.settings import Config
+from app.utils.logger import log_debug
+
+# Global cache instance (singleton pattern)
+_semantic_cache = None
+_semantic_cache_lock = threading.Lock()
+
+
+class SemanticCache:
+    """
+    In-process cache of RAG results keyed by question embedding.
+
+    Entries are grouped by scope (source / video set + top_k) and matched by
+    cosine similarity, so paraphrased questions can reuse earlier work:
+    - similarity >= context_threshold: reuse retrieved context chunks (skip Pinecone)
+    - similarity >= answer_threshold: reuse the generated answer (skip the LLM)
+    At most max_scopes scopes are kept; idle or least recently used ones are dropped whole.
+    """
+
+    def __init__(self, ttl, max_entries_per_scope, context_threshold, answer_threshold, max_scopes=1024):
+        self.ttl = ttl
+        self.max_entries_per_scope = max_entries_per_scope
+        self.context_threshold = context_threshold
+        self.answer_threshold = answer_threshold
+        # scope -> list of entry dicts, oldest first; a scope expires ttl after its newest entry
+        self._scopes = TTLCache(maxsize=max_scopes, ttl=ttl)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, scope, embedding):
+        """
+        Find the most similar cached entry for a question embedding.
+
+        Returns:
+            Tuple of (similarity, entry) or None if nothing is above context_threshold
+        """
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            entries = [e for e in self._scopes.get(scope, []) if e['expires_at'] > now]
+            if not entries:
+                self._scopes.pop(scope, None)
+                return None
+            self._scopes[scope] = entries
+
+            similarities = np.stack([e['embedding'] for e in entries]) @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+        if similarity < self.context_threshold:
+            return None
+
+        log_debug("Semantic cache hit (similarity=%.3f)", similarity)
+        return similarity, entries[best]
+
+    def store(self, scope, embedding, context_chunks, result=None, model=None):
+        """Cache retrieved context (and optionally the generated answer) for a question"""
+        entry = {
+            'embedding': self._normalize(embedding),
+            'context_chunks': context_chunks,
+            'result': result,
+            'model': model,
+            'expires_at': time.monotonic() + self.ttl
+        }
+
+        with self._lock:
+            entries = self._scopes.get(scope, [])
+            entries.append(entry)
+            if len(entries) > self.max_entries_per_scope:
+                del entries[:len(entries) - self.max_entries_per_scope]
+            # Re-inserting restarts the scope's expiry
+            self._scopes[scope] = entries
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._scopes.clear()
+
+
+def get_semantic_cache():
+    """Get or create the shared semantic cache (None when disabled)"""
+    global _semantic_cache
+
+    if not Config.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache(
+                    ttl=Config.SEMANTIC_CACHE_TTL,
+                    max_entries_per_scope=Config.SEMANTIC_CACHE_MAX_ENTRIES,
+                    context_threshold=Config.SEMANTIC_CACHE_CONTEXT_THRESHOLD,
+                    answer_threshold=Config.SEMANTIC_CACHE_ANSWER_THRESHOLD,
+                    max_scopes=Config.SEMANTIC_CACHE_MAX_SCOPES
+                )
+
+    return _semantic_cache
@@ -1,4 +1,8 @@
+import os
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from supabase import create_client, Client
 import bcrypt
 from config.settings import Config
@@ -7,6 +11,11 @@ from app.utils.logger import log_error, log_debug
 # Lazy initialization of Supabase client
 _supabase_client = None
 
+# source_id -> owner user_id; a source never changes owner, so ownership checks can skip the database.
+# Kept short because a delete only evicts the entry in the worker that handled it
+_source_owner_cache = TTLCache(maxsize=65536, ttl=Config.SOURCE_OWNER_CACHE_TTL)
+_source_owner_lock = threading.Lock()
+
 
 def get_supabase_client() -> Client:
     """
@@ -78,6 +87,40 @@ def create_user(username, password, initial_credits=1000):
     }).execute()
     return result.data[0] if result.data else None
 
+
+def _hash_password(password):
+    """Hash a password with a fresh bcrypt salt"""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+
+def create_users(users, initial_credits=1000):
+    """
+    Create several users with a single insert (existing usernames are left untouched)
+
+    Args:
+        users: List of (username, password) tuples
+        initial_credits: Initial credit balance for each new user
+
+    Returns:
+        List of created user records
+    """
+    supabase = get_supabase_client()
+
+    # bcrypt releases the GIL while hashing, so the hashes really run in parallel
+    max_workers = max(1, min(len(users), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        password_hashes = list(executor.map(_hash_password, [password for _, password in users]))
+
+    result = supabase.table('users').upsert([
+        {
+            'username': username,
+            'password_hash': password_hash,
+            'credits': initial_credits
+        }
+        for (username, _), password_hash in zip(users, password_hashes)
+    ], on_conflict='username', ignore_duplicates=True).execute()
+    return result.data if result.data else []
+
 # Source operations
 def create_source(user_id, video_ids, title=None, pinecone_namespace=None, metadata=None):
     """Create a new source entry"""
@@ -103,6 +146,7 @@ def create_source(user_id, video_ids, title=None, pinecone_namespace=None, metad
         'status': 'processing'
     }).execute()
 
+    _remember_source_owners([source_id], user_id)
     return result.data[0] if result.data else None
 
 
@@ -114,6 +158,25 @@ def update_source_status(source_id, status):
     }).eq('id', source_id).execute()
 
 
+def set_status_if(source_id, expected, new):
+    """
+    Move a source from one status to another in a single conditional UPDATE
+
+    Returns:
+        The updated source, or None if it doesn't exist or wasn't in the expected status
+    """
+    supabase = get_supabase_client()
+    result = supabase.table('sources').update({
+        'status': new
+    }).eq('id', source_id).eq('status', expected).execute()
+    if not result.data:
+        return None
+
+    source = result.data[0]
+    _remember_source_owners([source_id], source['user_id'])
+    return source
+
+
 def get_sources_by_user(user_id, limit=None, offset=None):
     """
     Get all sources for a user with optional pagination
@@ -145,17 +208,107 @@ def get_sources_count_by_user(user_id):
     return result.count if result.count is not None else 0
 
 
+def get_user_and_source(user_id, source_id):
+    """
+    Get a user and a source in one round trip (RPC from migrations/003)
+
+    Returns:
+        Tuple of (user, source); either may be None
+    """
+    supabase = get_supabase_client()
+    result = supabase.rpc('get_user_and_source', {'p_user_id': user_id, 'p_source_id': source_id}).execute()
+    data = result.data or {}
+    return data.get('user'), data.get('source')
+
+
+def get_sources_page_by_user(user_id, limit, offset=0, before=None):
+    """
+    Get one page of a user's sources, newest first
+
+    Args:
+        user_id: User ID
+        limit: Maximum number of results
+        offset: Number of results to skip (ignored when before is given)
+        before: Optional (created_at, source_id) keyset cursor from decode_cursor; returns sources strictly
+            older than it and skips the total count, so the cost doesn't grow with the user's sources
+
+    Returns:
+        {'sources': [...], 'total': int} ('total' is None in keyset mode)
+    """
+    supabase = get_supabase_client()
+    columns = 'id, title, video_ids, status, created_at'
+    query = (
+        supabase.table('sources').select(columns) if before
+        else supabase.table('sources').select(columns, count='exact')
+    ).eq('user_id', user_id)
+
+    if before:
+        # (created_at, id) < cursor, same "or" filter approach as get_messages_by_chat
+        created_at, source_id = before
+        query.params = query.params.add(
+            'or',
+            f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{source_id}))'
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    # Sends order=created_at.desc,id.desc: id breaks created_at ties so the keyset cursor is stable.
+    # PostgREST reads one order param with comma-separated keys, so a second .order() call can't add the
+    # tie-break; the param is set directly, like the "or" filter above
+    query.params = query.params.add('order', 'created_at.desc,id.desc')
+    result = query.limit(limit).execute()
+
+    # Every listed source belongs to user_id, so follow-up ownership checks start warm
+    _remember_source_owners([row['id'] for row in result.data or []], user_id)
+
+    return {
+        'sources': result.data if result.data else [],
+        'total': None if before else (result.count if result.count is not None else 0)
+    }
+
+
 def get_source_by_id(source_id):
     """Get a specific source"""
     supabase = get_supabase_client()
     result = supabase.table('sources').select('*').eq('id', source_id).execute()
-    return result.data[0] if result.data else None
+    if not result.data:
+        return None
+
+    source = result.data[0]
+    _remember_source_owners([source_id], source['user_id'])
+    return source
+
+
+def _remember_source_owners(source_ids, user_id):
+    """Record the owner of sources already loaded from the database"""
+    with _source_owner_lock:
+        for source_id in source_ids:
+            _source_owner_cache[source_id] = user_id
+
+
+def get_source_owner(source_id):
+    """Get the user_id owning a source (None if it doesn't exist), served from memory when known"""
+    with _source_owner_lock:
+        owner = _source_owner_cache.get(source_id)
+    if owner is not None:
+        return owner
+
+    supabase = get_supabase_client()
+    result = supabase.table('sources').select('user_id').eq('id', source_id).execute()
+    if not result.data:
+        return None
+
+    owner = result.data[0]['user_id']
+    _remember_source_owners([source_id], owner)
+    return owner
 
 
 def delete_source(source_id):
     """Delete a source"""
     supabase = get_supabase_client()
     supabase.table('sources').delete().eq('id', source_id).execute()
+    with _source_owner_lock:
+        _source_owner_cache.pop(source_id, None)
 
 
 def get_source_by_video_ids(video_ids):
@@ -364,10 +517,36 @@ def create_message(chat_id, role, content, model_used=None, primary_source=None,
     return result.data[0] if result.data else None
 
 
-def get_messages_by_chat(chat_id, limit=100, offset=0):
-    """Get all messages for a chat, ordered by created_at"""
+def get_messages_by_chat(chat_id, limit=100, offset=0, after=None):
+    """
+    Get messages for a chat, ordered by created_at
+
+    Args:
+        chat_id: Chat ID
+        limit: Maximum number of results
+        offset: Number of results to skip (ignored when after is given)
+        after: Optional (created_at, message_id) keyset cursor from decode_cursor; returns
+            messages strictly after it using an index range scan instead of OFFSET
+
+    Returns:
+        List of messages
+    """
     supabase = get_supabase_client()
-    result = supabase.table('messages').select('*').eq('chat_id', chat_id).order('created_at').limit(limit).offset(offset).execute()
+    query = supabase.table('messages').select('*').eq('chat_id', chat_id)
+
+    if after:
+        # (created_at, id) > cursor; postgrest-py has no or_() helper so the
+        # PostgREST "or" filter is added to the query params directly
+        created_at, message_id = after
+        query.params = query.params.add(
+            'or',
+            f'(created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{message_id}))'
+        )
+    elif offset:
+        query = query.offset(offset)
+
+    # id breaks created_at ties so the keyset cursor is stable
+    result = query.order('created_at,id').limit(limit).execute()
     return result.data if result.data else []
 
 
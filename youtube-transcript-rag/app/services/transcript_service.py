@@ -1,54 +1,62 @@
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, VideoUnavailable
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from config.settings import Config
 from app.utils.logger import log_info, log_error, log_debug
 
+# One API client per fetch thread so each worker keeps its HTTP connections alive
+_thread_local = threading.local()
+
+
+def _get_transcript_api():
+    """Get this thread's YouTubeTranscriptApi (its requests session is not shared across threads)"""
+    api = getattr(_thread_local, 'api', None)
+    if api is None:
+        api = _thread_local.api = YouTubeTranscriptApi()
+    return api
+
 
 class TranscriptService:
     @staticmethod
     def fetch_transcript(video_id):
         """Fetch transcript for a single video"""
-        log_info(f"Starting transcript fetch for video: {video_id}")
+        log_info("Starting transcript fetch for video: %s", video_id)
         try:
-            # Initialize API and get list of available transcripts
-            ytt_api = YouTubeTranscriptApi()
-            transcript_list = ytt_api.list(video_id)
-            log_debug(f"Retrieved transcript list for {video_id}")
+            # Get list of available transcripts (reusing this thread's API client)
+            transcript_list = _get_transcript_api().list(video_id)
+            log_debug("Retrieved transcript list for %s", video_id)
             
             # Try to get manually created transcript first
             transcript = None
             try:
                 transcript = transcript_list.find_manually_created_transcript(['en', 'hi', 'es', 'de', 'fr', 'ja', 'ko'])
-                log_info(f"Using manually created transcript for {video_id}: {transcript.language}")
+                log_info("Using manually created transcript for %s: %s", video_id, transcript.language)
             except:
                 try:
                     # Fall back to auto-generated
                     transcript = transcript_list.find_generated_transcript(['en', 'hi', 'es', 'de', 'fr', 'ja', 'ko'])
-                    log_info(f"Using auto-generated transcript for {video_id}: {transcript.language}")
+                    log_info("Using auto-generated transcript for %s: %s", video_id, transcript.language)
                 except:
                     # If specific languages fail, just get first available
                     for t in transcript_list:
                         transcript = t
-                        log_info(f"Using first available transcript for {video_id}: {transcript.language}")
+                        log_info("Using first available transcript for %s: %s", video_id, transcript.language)
                         break
             
             if not transcript:
                 raise Exception("No transcript available")
             
             # Fetch the actual transcript data
-            log_debug(f"Fetching transcript data for {video_id}")
+            log_debug("Fetching transcript data for %s", video_id)
             fetched_data = transcript.fetch()
-            log_info(f"Successfully fetched {len(fetched_data)} segments for {video_id}")
+            log_info("Successfully fetched %d segments for %s", len(fetched_data), video_id)
             
             # Convert to our format - USE DOT NOTATION FOR ATTRIBUTES
-            segments = []
-            for item in fetched_data:
-                segments.append({
-                    'text': item.text,
-                    'start': item.start,
-                    'duration': item.duration
-                })
+            segments = [
+                {'text': item.text, 'start': item.start, 'duration': item.duration}
+                for item in fetched_data
+            ]
             
             return {
                 'video_id': video_id,
@@ -67,11 +75,13 @@ class TranscriptService:
     @staticmethod
     def fetch_multiple_transcripts(video_ids):
         """Fetch transcripts for multiple videos using multithreading"""
-        log_info(f"Starting batch transcript fetch for {len(video_ids)} videos")
+        log_info("Starting batch transcript fetch for %d videos", len(video_ids))
         results = []
         errors = []
         
-        with ThreadPoolExecutor(max_workers=Config.MAX_THREADS) as executor:
+        # Fetching is almost pure network wait, so use a wider pool than CPU-bound work
+        max_workers = max(1, min(Config.TRANSCRIPT_FETCH_WORKERS, len(video_ids)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_video = {
                 executor.submit(TranscriptService.fetch_transcript, vid): vid 
                 for vid in video_ids
@@ -82,10 +92,10 @@ class TranscriptService:
                 try:
                     result = future.result()
                     results.append(result)
-                    log_info(f"✓ Successfully processed video {video_id}")
+                    log_info("✓ Successfully processed video %s", video_id)
                 except Exception as e:
                     errors.append({'video_id': video_id, 'error': str(e)})
                     log_error(f"✗ Failed to process video {video_id}: {str(e)}")
         
-        log_info(f"Batch complete: {len(results)} success, {len(errors)} errors")
+        log_info("Batch complete: %d success, %d errors", len(results), len(errors))
         return {'results': results, 'errors': errors}
@@ -1,16 +1,38 @@
+import threading
+from itertools import islice
+from cachetools import TTLCache
 from pytube import YouTube, Playlist
 from app.utils.helpers import extract_video_id, extract_playlist_id
 import requests
-from app.utils.logger import log_info, log_error
+from app.utils.logger import log_info, log_error, log_debug
+
+# Shared HTTP session so repeated oEmbed lookups reuse one keep-alive connection
+_http = requests.Session()
+
+# Short-lived caches for repeated submissions of the same video / playlist
+_metadata_cache = TTLCache(maxsize=4096, ttl=3600)
+_playlist_cache = TTLCache(maxsize=1024, ttl=3600)
+_cache_lock = threading.Lock()
 
 class YouTubeService:
     @staticmethod
-    def get_video_ids_from_playlist(playlist_url):
-        """Extract all video IDs from a playlist"""
+    def get_video_ids_from_playlist(playlist_url, limit=None, force_refresh=False):
+        """Extract video IDs from a playlist (stops paging once limit IDs are found)"""
+        cache_key = (extract_playlist_id(playlist_url), limit)
+        if not force_refresh:
+            with _cache_lock:
+                cached = _playlist_cache.get(cache_key)
+            if cached is not None:
+                log_debug("Playlist %s served from cache", cache_key[0])
+                return list(cached)
+
         try:
             playlist = Playlist(playlist_url)
-            video_ids = [extract_video_id(url) for url in playlist.video_urls]
-            return video_ids
+            # Playlist pages are fetched lazily, so slicing the generator skips pages we'd discard
+            video_ids = [extract_video_id(url) for url in islice(playlist.url_generator(), limit)]
+            with _cache_lock:
+                _playlist_cache[cache_key] = video_ids
+            return list(video_ids)
         except Exception as e:
             raise Exception(f"Failed to fetch playlist: {str(e)}")
     
@@ -24,18 +46,29 @@ class YouTubeService:
             return False
 
     @staticmethod
-    def get_video_metadata(video_id):
+    def get_video_metadata(video_id, force_refresh=False):
         """Fetch video metadata from YouTube oEmbed API (no API key needed)"""
+        if not force_refresh:
+            with _cache_lock:
+                cached = _metadata_cache.get(video_id)
+            if cached is not None:
+                log_debug("Metadata for %s served from cache", video_id)
+                return dict(cached)
+
         try:
             url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-            response = requests.get(url)
+            response = _http.get(url, timeout=10)
             data = response.json()
             
-            return {
+            metadata = {
                 'title': data.get('title', 'Unknown'),
                 'author': data.get('author_name', 'Unknown'),
                 'thumbnail': data.get('thumbnail_url', ''),
             }
+            # Only real lookups are cached; the fallback below is retried next time
+            with _cache_lock:
+                _metadata_cache[video_id] = metadata
+            return dict(metadata)
         except Exception as e:
             log_error(f"Failed to fetch metadata for {video_id}: {str(e)}")
             return {
@@ -1,32 +1,78 @@
+import base64
 import re
+import uuid
+from datetime import datetime
 from urllib.parse import urlparse, parse_qs
 
+# Compiled once; extract_video_id runs for every video of a playlist
+_VIDEO_ID_RE = re.compile(r'[a-zA-Z0-9_-]{11}')
+_VIDEO_URL_PATTERNS = (
+    re.compile(r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([a-zA-Z0-9_-]{11})'),
+    re.compile(r'youtube\.com\/watch\?.*v=([a-zA-Z0-9_-]{11})'),
+)
+_YOUTUBE_HOST_RE = re.compile(r'youtube\.com|youtu\.be')
+_PLAYLIST_ID_RE = re.compile(r'[?&]list=([^&#]+)')
+
 def extract_video_id(url_or_id):
     """Extract video ID from YouTube URL or return ID"""
     url_or_id = url_or_id.strip()
     
-    if re.match(r'^[a-zA-Z0-9_-]{11}$', url_or_id):
+    if _VIDEO_ID_RE.fullmatch(url_or_id):
         return url_or_id
     
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([a-zA-Z0-9_-]{11})',
-        r'youtube\.com\/watch\?.*v=([a-zA-Z0-9_-]{11})',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url_or_id)
+    for pattern in _VIDEO_URL_PATTERNS:
+        match = pattern.search(url_or_id)
         if match:
             return match.group(1)
     
     raise ValueError("Invalid YouTube URL or Video ID")
 
+def parse_youtube_url(url):
+    """
+    Classify a submitted URL with precompiled patterns
+
+    Returns:
+        ('playlist', playlist_id), ('video', video_id or None), or (None, None) for non-YouTube URLs
+    """
+    if not _YOUTUBE_HOST_RE.search(url):
+        return None, None
+
+    match = _PLAYLIST_ID_RE.search(url)
+    if match:
+        return 'playlist', match.group(1)
+
+    for pattern in _VIDEO_URL_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return 'video', match.group(1)
+    return 'video', None
+
 def extract_playlist_id(url):
     """Extract playlist ID from YouTube URL"""
-    parsed = urlparse(url)
-    if 'list' in parse_qs(parsed.query):
-        return parse_qs(parsed.query)['list'][0]
+    query = parse_qs(urlparse(url).query)
+    if 'list' in query:
+        return query['list'][0]
     raise ValueError("Invalid playlist URL")
 
+def encode_cursor(created_at, row_id):
+    """Opaque, URL-safe keyset cursor for a row's (created_at, id) position"""
+    return base64.urlsafe_b64encode(f"{created_at}_{row_id}".encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Parse a cursor made by encode_cursor back into (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed or its parts are not an ISO timestamp and a UUID
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, _, row_id = raw.rpartition('_')
+        # Normalized values are safe to place in a PostgREST filter
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(row_id))
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
 def format_timestamp_link(video_id, start_time):
     """Create YouTube link with timestamp"""
     return f"https://www.youtube.com/watch?v={video_id}&t={int(start_time)}s"
@@ -56,6 +56,11 @@ class Config:
     OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
     OPENROUTER_MODEL = os.getenv('OPENROUTER_MODEL', 'openai/gpt-4-turbo')
     OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+    # Concurrent answers share one pooled client; HTTP/2 multiplexes them over fewer connections
+    OPENROUTER_HTTP2 = os.getenv('OPENROUTER_HTTP2', 'True').lower() == 'true'
+    OPENROUTER_MAX_CONNECTIONS = int(os.getenv('OPENROUTER_MAX_CONNECTIONS', 64))
+    # Retries (with exponential backoff) for rate limits, 5xx and connection errors
+    OPENROUTER_MAX_RETRIES = int(os.getenv('OPENROUTER_MAX_RETRIES', 2))
 
     # Pinecone Configuration
     PINECONE_API_KEY = os.getenv('PINECONE_API_KEY')
@@ -64,16 +69,51 @@ class Config:
 
     # Processing Configuration
     MAX_THREADS = int(os.getenv('MAX_THREADS', 5))
+    TRANSCRIPT_FETCH_WORKERS = int(os.getenv('TRANSCRIPT_FETCH_WORKERS', 16))
+    PINECONE_UPSERT_BATCH_SIZE = int(os.getenv('PINECONE_UPSERT_BATCH_SIZE', 100))
+    PINECONE_POOL_THREADS = int(os.getenv('PINECONE_POOL_THREADS', 4))
+    PINECONE_USE_GRPC = os.getenv('PINECONE_USE_GRPC', 'False').lower() == 'true'
     VECTOR_SEARCH_TYPE = os.getenv('VECTOR_SEARCH_TYPE', 'similarity')
     TOP_K_RESULTS = int(os.getenv('TOP_K_RESULTS', 5))
+    # Prompt context trimming (0 disables): drop matches below this similarity score and
+    # keep the best-scoring chunks within this many characters of transcript text
+    MIN_CHUNK_SCORE = float(os.getenv('MIN_CHUNK_SCORE', 0))
+    MAX_CONTEXT_CHARS = int(os.getenv('MAX_CONTEXT_CHARS', 0))
+    CREDITS_PER_QUERY = int(os.getenv('CREDITS_PER_QUERY', 1))
+    # Seconds a source's owner is cached per worker (other workers see a deleted source until it expires)
+    SOURCE_OWNER_CACHE_TTL = int(os.getenv('SOURCE_OWNER_CACHE_TTL', 30))
+    # Shared store for client request_ids (e.g. redis://<host>:6379/2); empty keeps them per-process
+    REQUEST_STORE_URL = os.getenv('REQUEST_STORE_URL', '')
+    REQUEST_ID_TTL = int(os.getenv('REQUEST_ID_TTL', 600))
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDING_DIMENSIONS = 384
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', 20000))
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 64))
     CHUNK_SIZE = 1000
 
+    # Semantic Cache Configuration (reuse RAG results for paraphrased questions)
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'True').lower() == 'true'
+    SEMANTIC_CACHE_TTL = int(os.getenv('SEMANTIC_CACHE_TTL', 3600))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 256))
+    # Sources / video sets with cached entries (least recently used scopes are dropped)
+    SEMANTIC_CACHE_MAX_SCOPES = int(os.getenv('SEMANTIC_CACHE_MAX_SCOPES', 1024))
+    SEMANTIC_CACHE_CONTEXT_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_CONTEXT_THRESHOLD', 0.95))
+    SEMANTIC_CACHE_ANSWER_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_ANSWER_THRESHOLD', 0.98))
+    # Exact-match answers (same model, question and context chunks)
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', 1024))
+    ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', 3600))
+    # Directory for answers shared across restarts and workers (empty disables)
+    RESPONSE_CACHE_DIR = os.getenv('RESPONSE_CACHE_DIR', '')
+    # Answer files kept in that directory (oldest are deleted first)
+    RESPONSE_CACHE_MAX_FILES = int(os.getenv('RESPONSE_CACHE_MAX_FILES', 10000))
+
     # Rate Limiting Configuration
     RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
+    # memory:// is per-process; use redis:// in production so limits are shared across workers
     RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    RATELIMIT_STRATEGY = os.getenv('RATELIMIT_STRATEGY', 'moving-window')
     RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '100/hour')
+    RATELIMIT_LOGIN = os.getenv('RATELIMIT_LOGIN', '5/minute')
 
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
@@ -0,0 +1,22 @@
+-- Migration: Add get_user_and_source() RPC
+-- Purpose: Load the asking user and the queried source in a single round trip for /api/query/ask
+-- Date: 2026-10-15
+
+-- Returns {"user": <users row or null>, "source": <sources row or null>}
+-- The source is looked up by id only; ownership is still checked by the API so it can
+-- tell "not found" (404) apart from "not yours" (403)
+CREATE OR REPLACE FUNCTION get_user_and_source(p_user_id UUID, p_source_id UUID)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT json_build_object(
+        'user', (SELECT row_to_json(u) FROM users u WHERE u.id = p_user_id),
+        'source', (SELECT row_to_json(s) FROM sources s WHERE s.id = p_source_id)
+    );
+$$;
+
+COMMENT ON FUNCTION get_user_and_source(UUID, UUID) IS 'User and source rows in one call (used by /api/query/ask)';
+
+-- Rollback:
+-- DROP FUNCTION IF EXISTS get_user_and_source(UUID, UUID);
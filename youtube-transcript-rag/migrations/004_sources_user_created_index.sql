@@ -0,0 +1,13 @@
+-- Migration: Covering index for the sources list
+-- Purpose: Serve GET /api/transcripts/sources (rows + exact count for one user) from a single index
+-- Date: 2026-10-15
+
+-- Matches get_sources_page_by_user(): WHERE user_id = ? ORDER BY created_at DESC, projecting
+-- id, title, video_ids, status, created_at. With the projected columns INCLUDEd the page can
+-- be read with an index-only scan, and count='exact' counts index entries instead of heap rows
+CREATE INDEX IF NOT EXISTS idx_sources_user_created
+    ON sources (user_id, created_at DESC)
+    INCLUDE (id, title, video_ids, status);
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_sources_user_created;
@@ -4,6 +4,7 @@ Pytest configuration and fixtures for testing
 
 import pytest
 import os
+from flask_jwt_extended import create_access_token
 from app import create_app
 
 
@@ -16,6 +17,7 @@ def app():
 
     app = create_app()
     app.config['TESTING'] = True
+    app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-for-testing-only'
 
     yield app
 
@@ -33,10 +35,13 @@ def runner(app):
 
 
 @pytest.fixture
-def auth_headers():
-    """Mock authentication headers"""
+def auth_headers(app, mock_user):
+    """Authentication headers with a valid access token for mock_user"""
+    with app.app_context():
+        access_token = create_access_token(identity=mock_user['id'])
+
     return {
-        'Authorization': 'Bearer mock_token'
+        'Authorization': f'Bearer {access_token}'
     }
 
 
@@ -0,0 +1,146 @@
+"""
+Test AI service prompt building
+"""
+
+from app.services import ai_service
+from app.services.ai_service import AIService
+
+
+def make_service():
+    """AIService without the OpenRouter client (prompt building only)"""
+    service = AIService.__new__(AIService)
+    service.prompts = {'system_prompt': 'system', 'user_prompt_template': '{context}|{query}'}
+    return service
+
+
+def test_build_messages_groups_context_by_video():
+    """Test chunks are grouped per video in retrieval order and mapped to citation sources"""
+    chunks = [
+        {'metadata': {'video_id': 'a', 'start_time': 1.5, 'end_time': 3, 'text': 'first'}},
+        {'metadata': {'video_id': 'b', 'start_time': 0, 'end_time': 3, 'text': 'second'}},
+        {'metadata': {'video_id': 'a', 'start_time': 5, 'end_time': 9, 'text': 'third'}},
+    ]
+
+    messages, sources_map = make_service()._build_messages('question', chunks)
+
+    assert messages[0] == {'role': 'system', 'content': 'system'}
+    assert messages[1]['content'] == (
+        '\n=== Video 1: a ===\n'
+        '\n[Timestamp: 1s]\nfirst\n'
+        '\n[Timestamp: 5s]\nthird\n'
+        '\n=== Video 2: b ===\n'
+        '\n[Timestamp: 0s]\nsecond\n'
+        '|question'
+    )
+    assert list(sources_map) == ['a:1', 'b:0', 'a:5']
+    assert sources_map['a:1']['youtube_link'] == 'https://www.youtube.com/watch?v=a&t=1s'
+
+
+def test_generate_answer_reuses_exact_match(mocker):
+    """Test the same question over the same chunks is answered once, ignoring case and spacing"""
+    ai_service._answer_cache.clear()
+    service = make_service()
+    service.client = mocker.Mock()
+    service.client.chat.completions.create.return_value.choices = [
+        mocker.Mock(message=mocker.Mock(content='{"response": [{"text": "answer"}]}'))
+    ]
+    mocker.patch.object(service, '_log_ai_response')
+    chunks = [{'metadata': {'video_id': 'a', 'start_time': 1, 'end_time': 3, 'text': 'first'}}]
+
+    first = service.generate_answer('What is it?', chunks, 'model-a')
+    assert service.generate_answer('  what is   it? ', chunks, 'model-a') is first
+    assert service.client.chat.completions.create.call_count == 1
+
+    service.generate_answer('What is it?', chunks, 'model-b')
+    assert service.client.chat.completions.create.call_count == 2
+    ai_service._answer_cache.clear()
+
+
+def test_generate_answer_stream_emits_segments_as_they_complete(mocker):
+    """Test each answer segment is emitted once its JSON object has fully streamed"""
+    ai_service._answer_cache.clear()
+    service = make_service()
+    fragments = ['{"response": [{"text": "a {b}', '", "timestamp": 1, "video_id": "v"},', ' {"text": "c\\"}"}]}']
+    stream = mocker.MagicMock()
+    stream.__iter__.return_value = [
+        mocker.Mock(choices=[mocker.Mock(delta=mocker.Mock(content=fragment))]) for fragment in fragments
+    ]
+    service.client = mocker.Mock()
+    service.client.chat.completions.create.return_value = stream
+    mocker.patch.object(service, '_log_ai_response')
+    chunks = [{'metadata': {'video_id': 'v', 'start_time': 1, 'end_time': 3, 'text': 'first'}}]
+
+    events = list(service.generate_answer_stream('question', chunks, 'model-a'))
+
+    assert [event['type'] for event in events] == ['delta', 'delta', 'segment', 'delta', 'segment', 'result']
+    assert events[2]['segment'] == {
+        'text': 'a {b}', 'timestamp': 1, 'video_id': 'v', 'youtube_link': 'https://www.youtube.com/watch?v=v&t=1s'
+    }
+    assert events[4]['segment'] == {'text': 'c"}', 'timestamp': None, 'video_id': None}
+    assert events[-1]['result']['response'] == [events[2]['segment'], events[4]['segment']]
+    stream.close.assert_called_once_with()
+    ai_service._answer_cache.clear()
+
+
+def test_select_context_trims_weak_and_over_budget_chunks(mocker):
+    """Test low-scoring chunks and chunks past the character budget are dropped, keeping retrieval order"""
+    mocker.patch.object(ai_service.Config, 'MIN_CHUNK_SCORE', 0.5)
+    mocker.patch.object(ai_service.Config, 'MAX_CONTEXT_CHARS', 10)
+    chunks = [
+        {'score': 0.6, 'metadata': {'text': 'aaaa'}},
+        {'score': 0.9, 'metadata': {'text': 'bbbbbb'}},
+        {'score': 0.8, 'metadata': {'text': 'cccc'}},
+        {'score': 0.3, 'metadata': {'text': 'd'}},
+    ]
+
+    assert AIService._select_context(chunks) == [chunks[1], chunks[2]]
+
+
+def test_select_context_keeps_best_chunk(mocker):
+    """Test the best chunk survives even when everything is below the threshold"""
+    mocker.patch.object(ai_service.Config, 'MIN_CHUNK_SCORE', 0.5)
+    chunks = [{'score': 0.2, 'metadata': {'text': 'a'}}, {'score': 0.4, 'metadata': {'text': 'b'}}]
+
+    assert AIService._select_context(chunks) == [chunks[1]]
+
+
+def test_render_template_matches_str_format():
+    """Test the pre-parsed prompt template renders exactly like str.format, including escaped braces"""
+    template = 'Answer as {{"response": []}}\n{context}\nQuestion: {query}'
+
+    assert ai_service._render_template(template, context='ctx {x}', query='q?') == \
+        template.format(context='ctx {x}', query='q?')
+
+
+def test_parse_response_lists_sources_in_citation_order():
+    """Test sources follow the order the answer first cites them, including ones missing from the map"""
+    sources_map = {'a:1': {'video_id': 'a', 'start_time': 1, 'youtube_link': 'link-a'}}
+    answer = ('{"response": [{"text": "x", "timestamp": 7.5, "video_id": "b"},'
+              ' {"text": "y", "timestamp": 1, "video_id": "a"}, {"text": "z", "timestamp": 7.5, "video_id": "b"}]}')
+
+    result = make_service()._parse_response_segments(answer, sources_map)
+
+    assert len(result['response']) == 3
+    assert result['all_sources'] == [
+        {'video_id': 'b', 'start_time': 7, 'youtube_link': 'https://www.youtube.com/watch?v=b&t=7.5s'},
+        sources_map['a:1'],
+    ]
+
+
+def test_log_ai_response_is_written_in_background(mocker, tmp_path):
+    """Test response log entries are handed to the writer thread instead of written inline"""
+    service = make_service()
+    service.ai_responses_log = str(tmp_path / 'ai_responses.json')
+    writer = mocker.patch.object(ai_service, '_get_log_writer').return_value
+    writer.submit_task.return_value = True
+
+    service._log_ai_response('question', '{"response": []}', 'model-a')
+
+    func, path, entry = writer.submit_task.call_args.args
+    assert func is ai_service._write_ai_response_log
+    assert not (tmp_path / 'ai_responses.json').exists()
+
+    func(path, entry)
+    lines = (tmp_path / 'ai_responses.json').read_text(encoding='utf-8').splitlines()
+    assert ai_service.orjson.loads(lines[0])['query'] == 'question'
+    assert lines[1] == '-' * 100
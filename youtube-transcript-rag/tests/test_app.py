@@ -49,3 +49,46 @@ def test_cors_headers(client):
     """Test CORS headers are set"""
     response = client.get('/health')
     assert 'Access-Control-Allow-Origin' in response.headers
+
+
+def test_rate_limit_noop_when_disabled(monkeypatch):
+    """Test rate_limit leaves routes untouched when no limiter is configured"""
+    import app as app_module
+    monkeypatch.setattr(app_module, 'limiter', None)
+
+    def view():
+        return 'ok'
+
+    assert app_module.rate_limit('5/minute')(view) is view
+
+
+def test_jsonify_uses_orjson(app):
+    """Test jsonify serializes datetimes, UUIDs and numpy arrays"""
+    from datetime import datetime
+    from uuid import UUID
+    import numpy as np
+    from flask import jsonify
+
+    with app.app_context():
+        response = jsonify({
+            'id': UUID('550e8400-e29b-41d4-a716-446655440000'),
+            'created_at': datetime(2024, 1, 1, 12, 0, 0),
+            'values': np.array([0.5, 1.0], dtype=np.float32)
+        })
+
+    data = json.loads(response.data)
+    assert data == {
+        'id': '550e8400-e29b-41d4-a716-446655440000',
+        'created_at': '2024-01-01T12:00:00+00:00',
+        'values': [0.5, 1.0]
+    }
+
+
+def test_routes_registered_once(app):
+    """Test every endpoint maps to exactly one URL rule (no blueprint registered twice)"""
+    rule_counts = {}
+    for rule in app.url_map.iter_rules():
+        rule_counts[(rule.endpoint, rule.rule)] = rule_counts.get((rule.endpoint, rule.rule), 0) + 1
+
+    assert all(count == 1 for count in rule_counts.values())
+    assert len([rule for rule in app.url_map.iter_rules() if rule.endpoint == 'transcript.process_videos']) == 1
@@ -0,0 +1,67 @@
+"""
+Test authentication routes
+"""
+
+import pytest
+from flask import json
+from app.routes import auth_routes
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Start each test with an empty login cache"""
+    auth_routes._user_cache.clear()
+    yield
+    auth_routes._user_cache.clear()
+
+
+def test_login_unknown_user(client, mocker):
+    """Test login with unknown username returns 401"""
+    mocker.patch.object(auth_routes, 'get_user', return_value=None)
+
+    response = client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+    assert response.status_code == 401
+
+    data = json.loads(response.data)
+    assert data['error'] == 'Invalid credentials'
+
+
+def test_login_unknown_user_still_checks_password(client, mocker):
+    """Test unknown usernames still pay for a bcrypt verify against the dummy hash"""
+    mocker.patch.object(auth_routes, 'get_user', return_value=None)
+    check_password = mocker.patch.object(auth_routes, 'check_password', return_value=False)
+
+    client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+    check_password.assert_called_once_with('password123', auth_routes._DUMMY_PASSWORD_HASH)
+
+
+def test_login_user_lookup_is_cached(client, mocker):
+    """Test repeated login attempts for the same username hit the database once"""
+    get_user = mocker.patch.object(auth_routes, 'get_user', return_value=None)
+
+    client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+    client.post('/api/auth/login', json={'username': 'nobody', 'password': 'password123'})
+
+    get_user.assert_called_once_with('nobody')
+
+
+def test_login_validation_error(client, mocker):
+    """Test invalid login payloads are rejected by schema validation before any lookup"""
+    get_user = mocker.patch.object(auth_routes, 'get_user')
+
+    response = client.post('/api/auth/login', json={'username': 'ab'})
+    assert response.status_code == 400
+
+    data = json.loads(response.data)
+    assert data['error'] == 'ValidationError'
+    assert {tuple(error['loc']) for error in data['details']} == {('username',), ('password',)}
+    get_user.assert_not_called()
+
+
+def test_login_username_normalized(client, mocker):
+    """Test the username is lowercased before the lookup"""
+    get_user = mocker.patch.object(auth_routes, 'get_user', return_value=None)
+
+    client.post('/api/auth/login', json={'username': 'TestUser', 'password': 'password123'})
+    get_user.assert_called_once_with('testuser')
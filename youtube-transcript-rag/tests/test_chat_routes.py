@@ -0,0 +1,80 @@
+"""
+Test chat routes
+"""
+
+from flask import json
+from app.routes import chat_routes
+from app.utils.helpers import encode_cursor
+
+MESSAGE_ID = '7c9e6679-7425-40de-944b-e07fc1f90ae7'
+
+
+def test_messages_next_cursor(client, auth_headers, mocker):
+    """Test a full page of messages returns a keyset cursor for the next page"""
+    mocker.patch.object(chat_routes, 'get_chat_by_id', return_value={'id': 'chat-1', 'user_id': 'test-user-id-123'})
+    get_messages = mocker.patch.object(chat_routes, 'get_messages_by_chat', return_value=[
+        {'id': 'msg-1', 'created_at': '2025-01-01T00:00:00+00:00'},
+        {'id': MESSAGE_ID, 'created_at': '2025-01-01T00:00:01+00:00'},
+    ])
+
+    response = client.get('/api/chats/chat-1/messages?limit=2', headers=auth_headers)
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data['next_cursor'] == encode_cursor('2025-01-01T00:00:01+00:00', MESSAGE_ID)
+    assert '+' not in data['next_cursor']
+    get_messages.assert_called_once_with('chat-1', limit=2, offset=0, after=None)
+
+
+def test_messages_after_cursor(client, auth_headers, mocker):
+    """Test the after cursor is decoded into (created_at, id) for the keyset query"""
+    mocker.patch.object(chat_routes, 'get_chat_by_id', return_value={'id': 'chat-1', 'user_id': 'test-user-id-123'})
+    get_messages = mocker.patch.object(chat_routes, 'get_messages_by_chat', return_value=[])
+
+    response = client.get(
+        '/api/chats/chat-1/messages',
+        query_string={'after': encode_cursor('2025-01-01T00:00:01+00:00', MESSAGE_ID)},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data['next_cursor'] is None
+    get_messages.assert_called_once_with(
+        'chat-1', limit=100, offset=0, after=('2025-01-01T00:00:01+00:00', MESSAGE_ID)
+    )
+
+
+def test_messages_invalid_cursor(client, auth_headers, mocker):
+    """Test a cursor that is not a timestamp and UUID is a 400, not a database error"""
+    mocker.patch.object(chat_routes, 'get_chat_by_id', return_value={'id': 'chat-1', 'user_id': 'test-user-id-123'})
+    get_messages = mocker.patch.object(chat_routes, 'get_messages_by_chat')
+
+    for cursor in ('nonsense', encode_cursor('2025-01-01', 'x",id.gt.0)'), encode_cursor('yesterday', MESSAGE_ID)):
+        response = client.get('/api/chats/chat-1/messages', query_string={'after': cursor}, headers=auth_headers)
+        assert response.status_code == 400
+    get_messages.assert_not_called()
+
+
+def test_create_chat_requires_source_id(client, auth_headers, mocker):
+    """Test creating a chat without source_id returns a validation error"""
+    create_chat = mocker.patch.object(chat_routes, 'create_chat')
+
+    response = client.post('/api/chats', json={'title': 'My chat'}, headers=auth_headers)
+    assert response.status_code == 400
+
+    data = json.loads(response.data)
+    assert data['error'] == 'ValidationError'
+    create_chat.assert_not_called()
+
+
+def test_get_chats_invalid_limit(client, auth_headers, mocker):
+    """Test a non-integer limit is a 400 validation error rather than a 500"""
+    get_chats = mocker.patch.object(chat_routes, 'get_chats_by_user')
+
+    response = client.get('/api/chats?limit=abc', headers=auth_headers)
+    assert response.status_code == 400
+
+    data = json.loads(response.data)
+    assert data['error'] == 'ValidationError'
+    get_chats.assert_not_called()
@@ -0,0 +1,54 @@
+"""
+Test disk response cache
+"""
+
+import os
+import time
+from app.services.disk_cache import DiskCache
+
+
+def test_set_then_get_round_trips(tmp_path):
+    """Test a stored answer is read back from its hashed path"""
+    cache = DiskCache(str(tmp_path), ttl=60)
+    key = DiskCache.make_key('model', [{'role': 'system', 'content': 's'}, {'role': 'user', 'content': 'u'}])
+
+    cache.set(key, {'response': [{'text': 'answer'}], 'model_used': 'model'})
+
+    assert cache.get(key) == {'response': [{'text': 'answer'}], 'model_used': 'model'}
+    assert os.path.exists(os.path.join(str(tmp_path), key[:2], key[2:] + '.json'))
+
+
+def test_key_depends_on_model_and_prompt():
+    """Test different models or prompts never share an entry"""
+    messages = [{'role': 'user', 'content': 'u'}]
+    assert DiskCache.make_key('a', messages) != DiskCache.make_key('b', messages)
+    assert DiskCache.make_key('a', messages) != DiskCache.make_key('a', [{'role': 'user', 'content': 'v'}])
+
+
+def test_expired_and_missing_entries_miss(tmp_path):
+    """Test entries older than the TTL and unknown keys return None"""
+    cache = DiskCache(str(tmp_path), ttl=60)
+    key = DiskCache.make_key('model', [{'role': 'user', 'content': 'u'}])
+    cache.set(key, {'response': []})
+
+    path = os.path.join(str(tmp_path), key[:2], key[2:] + '.json')
+    os.utime(path, (0, 0))
+
+    assert cache.get(key) is None
+    assert not os.path.exists(path)
+    assert cache.get('f' * 64) is None
+
+
+def test_sweep_removes_expired_and_oldest_files(tmp_path):
+    """Test a sweep deletes expired files and keeps only the newest max_files entries"""
+    cache = DiskCache(str(tmp_path), ttl=3600, max_files=2)
+    keys = [DiskCache.make_key('model', [{'role': 'user', 'content': str(i)}]) for i in range(4)]
+    for age, key in zip((7200, 30, 20, 10), keys):
+        path = os.path.join(str(tmp_path), key[:2], key[2:] + '.json')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'{"response": []}')
+        os.utime(path, (time.time() - age,) * 2)
+
+    assert cache.sweep() == 2
+    assert [cache.get(key) is not None for key in keys] == [False, False, True, True]
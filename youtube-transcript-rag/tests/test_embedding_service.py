@@ -0,0 +1,41 @@
+"""
+Test transcript chunking
+"""
+
+from app.services.embedding_service import EmbeddingService
+
+
+def test_chunk_transcript_splits_on_chunk_size():
+    """Test segments are grouped into chunks no longer than chunk_size with time bounds"""
+    segments = [
+        {'text': 'aaaa', 'start': 0.0, 'duration': 1.0},
+        {'text': 'bbbb', 'start': 1.0, 'duration': 1.0},
+        {'text': 'cccc', 'start': 2.0, 'duration': 1.5},
+    ]
+
+    chunks = EmbeddingService.chunk_transcript(segments, chunk_size=8)
+
+    assert [chunk['text'] for chunk in chunks] == [' aaaa bbbb', 'cccc']
+    assert [(chunk['start_time'], chunk['end_time']) for chunk in chunks] == [(0.0, 2.0), (2.0, 3.5)]
+    assert chunks[0]['segments'] == segments[:2]
+    assert chunks[1]['segments'] == segments[2:]
+
+
+def test_create_embeddings_reuses_cached_texts(mocker):
+    """Test texts embedded before are served from the content-hash cache"""
+    import numpy as np
+    from app.services import embedding_service
+
+    embedding_service._embedding_cache.clear()
+    model = mocker.Mock()
+    model.encode.side_effect = lambda texts, **kwargs: np.array([[float(len(t))] for t in texts])
+    mocker.patch.object(embedding_service, 'get_embedding_model', return_value=(model, 'cpu', 1))
+    service = EmbeddingService()
+
+    assert service.create_embeddings(['a', 'bb']) == [[1.0], [2.0]]
+    assert service.create_embeddings(['bb', 'ccc']) == [[2.0], [3.0]]
+
+    assert model.encode.call_args_list[1].args[0] == ['ccc']
+    # Cached rows own their data instead of viewing the whole encoded batch
+    assert all(row.base is None for row in embedding_service._embedding_cache.values())
+    embedding_service._embedding_cache.clear()
@@ -0,0 +1,58 @@
+"""
+Test helper utilities
+"""
+
+import pytest
+from app.utils.helpers import extract_video_id, extract_playlist_id, parse_youtube_url, encode_cursor, decode_cursor
+
+
+@pytest.mark.parametrize('url_or_id', [
+    'dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ?t=42',
+    'https://www.youtube.com/embed/dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ',
+])
+def test_extract_video_id(url_or_id):
+    """Test video IDs are extracted from every supported URL form"""
+    assert extract_video_id(url_or_id) == 'dQw4w9WgXcQ'
+
+
+def test_extract_video_id_invalid():
+    """Test non-YouTube input is rejected"""
+    with pytest.raises(ValueError):
+        extract_video_id('https://example.com/video')
+
+
+def test_extract_playlist_id():
+    """Test playlist ID is read from the list query parameter"""
+    assert extract_playlist_id('https://www.youtube.com/playlist?list=PL123') == 'PL123'
+    with pytest.raises(ValueError):
+        extract_playlist_id('https://www.youtube.com/watch?v=dQw4w9WgXcQ')
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ', ('video', 'dQw4w9WgXcQ')),
+    ('https://youtu.be/dQw4w9WgXcQ?t=42', ('video', 'dQw4w9WgXcQ')),
+    ('https://www.youtube.com/playlist?list=PL123', ('playlist', 'PL123')),
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123', ('playlist', 'PL123')),
+    ('https://www.youtube.com/channel/abc', ('video', None)),
+    ('https://example.com/watch?v=dQw4w9WgXcQ', (None, None)),
+])
+def test_parse_youtube_url(url, expected):
+    """Test URLs are validated and classified as playlist or video in one call"""
+    assert parse_youtube_url(url) == expected
+
+
+def test_cursor_round_trip():
+    """Test cursors are URL-safe and decode back to a normalized timestamp and UUID"""
+    cursor = encode_cursor('2025-01-01T00:00:01.5+00:00', '7C9E6679-7425-40DE-944B-E07FC1F90AE7')
+    assert all(c.isalnum() or c in '-_' for c in cursor)
+    assert decode_cursor(cursor) == ('2025-01-01T00:00:01.500000+00:00', '7c9e6679-7425-40de-944b-e07fc1f90ae7')
+
+
+@pytest.mark.parametrize('cursor', ['', 'not-base64!', encode_cursor('2025-01-01', 'msg-2')])
+def test_decode_cursor_rejects_malformed(cursor):
+    """Test malformed cursors raise ValueError"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
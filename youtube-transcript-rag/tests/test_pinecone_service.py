@@ -0,0 +1,113 @@
+"""
+Test batched transcript storage
+"""
+
+from app.services import pinecone_service
+from app.services.pinecone_service import PineconeService
+
+
+def make_transcript(video_id, texts):
+    """Transcript dict with one segment per text"""
+    return {
+        'video_id': video_id,
+        'language': 'English',
+        'language_code': 'en',
+        'segments': [{'text': text, 'start': float(i), 'duration': 1.0} for i, text in enumerate(texts)]
+    }
+
+
+def make_service(mocker, existing=()):
+    """PineconeService without a Pinecone client, with a mocked index and embeddings"""
+    service = PineconeService.__new__(PineconeService)
+    service.embedding_service = mocker.Mock()
+    service.embedding_service.create_embeddings.side_effect = lambda texts: [[0.1]] * len(texts)
+    service.get_existing_video_ids = lambda video_ids: {v for v in video_ids if v in existing}
+    index = mocker.Mock()
+    mocker.patch.object(service, 'get_index', return_value=index)
+    mocker.patch.object(pinecone_service.EmbeddingService, 'chunk_transcript', side_effect=lambda segments: [
+        {'text': s['text'], 'start_time': s['start'], 'end_time': s['start'] + s['duration']} for s in segments
+    ])
+    return service, index
+
+
+def test_store_transcripts_batch_upserts_across_videos(mocker):
+    """Test vectors from all new videos are upserted together in fixed-size batches"""
+    mocker.patch.object(pinecone_service.Config, 'PINECONE_UPSERT_BATCH_SIZE', 3)
+    service, index = make_service(mocker, existing={'old'})
+    transcripts = [
+        make_transcript('a', ['one', 'two']),
+        make_transcript('old', ['skip']),
+        make_transcript('b', ['three', 'four', 'five']),
+    ]
+
+    storage = service.store_transcripts_batch(transcripts, source_id='src', user_id='user')
+
+    batches = [[v['id'] for v in call.kwargs['vectors']] for call in index.upsert.call_args_list]
+    assert batches == [['a_0', 'a_1', 'b_0'], ['b_1', 'b_2']]
+    assert index.upsert.call_args_list[0].kwargs['vectors'][0]['metadata']['source_id'] == 'src'
+    assert all(call.kwargs['async_req'] for call in index.upsert.call_args_list)
+    assert storage['errors'] == []
+    assert {r['video_id']: r['status'] for r in storage['results']} == {'a': 'stored', 'old': 'exists', 'b': 'stored'}
+    service.embedding_service.create_embeddings.assert_called_once_with(['one', 'two', 'three', 'four', 'five'])
+
+
+def test_store_transcripts_batch_maps_failed_upsert_to_videos(mocker):
+    """Test a failed upsert batch is reported against every video it carried"""
+    mocker.patch.object(pinecone_service.Config, 'PINECONE_UPSERT_BATCH_SIZE', 2)
+    service, index = make_service(mocker)
+    failing = mocker.Mock()
+    failing.get.side_effect = Exception('boom')
+    index.upsert.side_effect = [mocker.Mock(), failing]
+    transcripts = [make_transcript('a', ['one', 'two']), make_transcript('b', ['three'])]
+
+    storage = service.store_transcripts_batch(transcripts)
+
+    assert storage['results'] == [{'status': 'stored', 'video_id': 'a', 'chunks': 2}]
+    assert storage['errors'] == [{'video_id': 'b', 'error': 'boom'}]
+
+
+def test_store_transcripts_batch_deletes_partially_stored_videos(mocker):
+    """Test a video whose later batch failed has its stored chunks removed so a retry re-stores it"""
+    mocker.patch.object(pinecone_service.Config, 'PINECONE_UPSERT_BATCH_SIZE', 2)
+    service, index = make_service(mocker)
+    failing = mocker.Mock()
+    failing.get.side_effect = Exception('boom')
+    index.upsert.side_effect = [mocker.Mock(), failing]
+    transcripts = [make_transcript('a', ['one']), make_transcript('b', ['two', 'three'])]
+
+    storage = service.store_transcripts_batch(transcripts)
+
+    assert storage['errors'] == [{'video_id': 'b', 'error': 'boom'}]
+    index.delete.assert_called_once_with(ids=['b_0', 'b_1'])
+
+
+def test_get_existing_video_ids_uses_one_fetch(mocker):
+    """Test existence of several videos is answered by a single fetch of their first chunk ids"""
+    service = PineconeService.__new__(PineconeService)
+    index = mocker.Mock()
+    index.fetch.return_value.vectors = {'a_b_0': object()}
+    mocker.patch.object(service, 'get_index', return_value=index)
+
+    assert service.get_existing_video_ids(['a_b', 'c']) == {'a_b'}
+    index.fetch.assert_called_once_with(ids=['a_b_0', 'c_0'])
+
+
+def test_grpc_upserts_wait_on_futures(mocker):
+    """Test gRPC upserts are awaited through their futures"""
+    service, index = make_service(mocker)
+    service.use_grpc = True
+
+    storage = service.store_transcripts_batch([make_transcript('a', ['one'])])
+
+    index.upsert.return_value.result.assert_called_once_with()
+    index.upsert.return_value.get.assert_not_called()
+    assert storage['errors'] == []
+
+
+def test_create_client_falls_back_to_rest(mocker):
+    """Test an unavailable gRPC client falls back to the REST client"""
+    mocker.patch.object(pinecone_service.Config, 'PINECONE_USE_GRPC', True)
+    mocker.patch.dict('sys.modules', {'pinecone.grpc': None})
+    rest = mocker.patch.object(pinecone_service, 'Pinecone')
+
+    assert pinecone_service._create_client() == (rest.return_value, False)
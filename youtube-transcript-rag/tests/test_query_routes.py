@@ -0,0 +1,172 @@
+"""
+Test query routes
+"""
+
+import pytest
+from flask import json
+from app.routes import query_routes
+from app.services.request_store import RequestStore
+
+CHUNKS = [{'metadata': {'video_id': 'dQw4w9WgXcQ', 'start_time': 0, 'end_time': 10, 'text': 'Hello'}}]
+RESULT = {'response': [{'text': 'Hi', 'timestamp': 0, 'video_id': 'dQw4w9WgXcQ'}], 'sources': [], 'model_used': 'test-model'}
+
+
+class InlineProcessor:
+    """Runs submitted background tasks immediately"""
+
+    def submit_task(self, task_func, *args, **kwargs):
+        task_func(*args, **kwargs)
+        return True
+
+
+@pytest.fixture
+def rag_mocks(mocker, mock_user, mock_source):
+    """Mock every service the /ask pipeline touches"""
+    mocker.patch.object(query_routes, 'get_request_store', return_value=RequestStore())
+    mocker.patch.object(query_routes, '_get_persist_processor', return_value=InlineProcessor())
+    mocker.patch.object(query_routes, 'get_user_and_source', return_value=(mock_user, mock_source))
+    mocker.patch.object(query_routes, 'get_semantic_cache', return_value=None)
+    mocker.patch.object(query_routes, 'EmbeddingService').return_value.embed.return_value = [0.1, 0.2]
+    mocker.patch.object(query_routes, 'get_pinecone_service').return_value.query_videos.return_value = CHUNKS
+    mocker.patch.object(query_routes, 'create_chat', return_value={'id': 'chat-1'})
+    return {
+        'update_credits': mocker.patch.object(query_routes, 'update_credits', return_value=999),
+        'ai_service': mocker.patch.object(query_routes, 'get_ai_service').return_value,
+        'create_message': mocker.patch.object(query_routes, 'create_message')
+    }
+
+
+def test_ask_returns_answer(client, auth_headers, rag_mocks):
+    """Test /ask generates an answer, saves the chat and deducts credits"""
+    rag_mocks['ai_service'].generate_answer.return_value = RESULT
+
+    response = client.post('/api/query/ask', json={'question': 'What is this?', 'source_id': 'test-source-id-123'},
+                           headers=auth_headers)
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data['chat_id'] == 'chat-1'
+    assert data['response'] == RESULT['response']
+    assert data['credits_remaining'] == 999
+    assert rag_mocks['create_message'].call_count == 2
+    rag_mocks['update_credits'].assert_called_once_with('testuser', -1)
+
+
+def test_ask_retry_with_request_id_is_not_charged_twice(client, auth_headers, rag_mocks):
+    """Test a retried request_id returns the original chat without generating, saving or charging again"""
+    rag_mocks['ai_service'].generate_answer.return_value = RESULT
+    body = {'question': 'What is this?', 'source_id': 'test-source-id-123', 'request_id': 'req-1'}
+
+    first = client.post('/api/query/ask', json=body, headers=auth_headers)
+    query_routes.create_chat.return_value = {'id': 'chat-2'}
+    response = client.post('/api/query/ask', json=body, headers=auth_headers)
+    assert response.status_code == 200
+
+    assert json.loads(response.data) == json.loads(first.data)
+    assert json.loads(response.data)['chat_id'] == 'chat-1'
+    query_routes.create_chat.assert_called_once()
+    rag_mocks['ai_service'].generate_answer.assert_called_once()
+    assert rag_mocks['create_message'].call_count == 2
+    rag_mocks['update_credits'].assert_called_once()
+
+
+def test_ask_request_id_in_progress_returns_conflict(client, auth_headers, rag_mocks):
+    """Test a retry arriving while the first attempt is still running is rejected"""
+    query_routes.get_request_store().claim(('test-user-id-123', 'req-1'))
+
+    response = client.post('/api/query/ask', json={
+        'question': 'What is this?', 'source_id': 'test-source-id-123', 'request_id': 'req-1'
+    }, headers=auth_headers)
+    assert response.status_code == 409
+    rag_mocks['ai_service'].generate_answer.assert_not_called()
+
+
+def test_ask_failed_request_id_can_be_retried(client, auth_headers, rag_mocks, mocker):
+    """Test a request_id whose answer failed is released for the client's retry"""
+    rag_mocks['ai_service'].generate_answer.side_effect = [RuntimeError('model down'), RESULT]
+    mocker.patch.object(query_routes, 'delete_chat')
+    body = {'question': 'What is this?', 'source_id': 'test-source-id-123', 'request_id': 'req-1'}
+
+    assert client.post('/api/query/ask', json=body, headers=auth_headers).status_code == 500
+    response = client.post('/api/query/ask', json=body, headers=auth_headers)
+    assert response.status_code == 200
+    rag_mocks['update_credits'].assert_called_once()
+
+
+def test_ask_requires_question(client, auth_headers, rag_mocks):
+    """Test /ask rejects a missing question before any retrieval"""
+    response = client.post('/api/query/ask', json={'source_id': 'test-source-id-123'}, headers=auth_headers)
+    assert response.status_code == 400
+    assert json.loads(response.data)['error'] == 'Question is required'
+
+
+def test_ask_stream_emits_deltas_then_done(client, auth_headers, rag_mocks):
+    """Test /ask/stream sends token deltas and parsed segments followed by the full payload"""
+    rag_mocks['ai_service'].generate_answer_stream.return_value = iter([
+        {'type': 'delta', 'text': '{"resp'},
+        {'type': 'delta', 'text': 'onse": []}'},
+        {'type': 'segment', 'segment': {'text': 'part', 'timestamp': None, 'video_id': None}},
+        {'type': 'result', 'result': RESULT}
+    ])
+
+    response = client.post('/api/query/ask/stream', json={'question': 'What is this?', 'source_id': 'test-source-id-123'},
+                           headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+
+    events = [block.split('\n') for block in response.get_data(as_text=True).strip().split('\n\n')]
+    assert [lines[0] for lines in events] == ['event: delta', 'event: delta', 'event: segment', 'event: done']
+    assert json.loads(events[2][1][len('data: '):])['text'] == 'part'
+
+    done = json.loads(events[-1][1][len('data: '):])
+    assert done['chat_id'] == 'chat-1'
+    assert done['response'] == RESULT['response']
+    assert rag_mocks['create_message'].call_count == 2
+
+
+def test_ask_stream_client_disconnect_discards_new_chat(client, auth_headers, rag_mocks, mocker):
+    """Test closing the stream mid-answer stops generation without saving or charging"""
+    closed = []
+
+    def answer_stream(*args):
+        try:
+            yield {'type': 'delta', 'text': '{"resp'}
+            yield {'type': 'delta', 'text': 'onse": []}'}
+            yield {'type': 'result', 'result': RESULT}
+        finally:
+            closed.append(True)
+
+    rag_mocks['ai_service'].generate_answer_stream.side_effect = answer_stream
+    delete_chat = mocker.patch.object(query_routes, 'delete_chat')
+
+    response = client.post('/api/query/ask/stream', json={'question': 'What is this?', 'source_id': 'test-source-id-123'},
+                           headers=auth_headers, buffered=False)
+    assert next(response.response).startswith(b'event: delta')
+    response.close()
+
+    assert closed == [True]
+    delete_chat.assert_called_once_with('chat-1')
+    rag_mocks['create_message'].assert_not_called()
+    rag_mocks['update_credits'].assert_not_called()
+
+
+def test_ask_rejects_foreign_source(client, auth_headers, rag_mocks, mocker, mock_user, mock_source):
+    """Test a source owned by another user is a 403 from the combined user/source lookup"""
+    foreign_source = dict(mock_source, user_id='someone-else')
+    mocker.patch.object(query_routes, 'get_user_and_source', return_value=(mock_user, foreign_source))
+
+    response = client.post('/api/query/ask', json={'question': 'What is this?', 'source_id': 'test-source-id-123'},
+                           headers=auth_headers)
+    assert response.status_code == 403
+
+
+def test_ask_generation_failure_discards_new_chat(client, auth_headers, rag_mocks, mocker):
+    """Test the chat created alongside generation is deleted when generation fails"""
+    rag_mocks['ai_service'].generate_answer.side_effect = Exception('LLM down')
+    delete_chat = mocker.patch.object(query_routes, 'delete_chat')
+
+    response = client.post('/api/query/ask', json={'question': 'What is this?', 'source_id': 'test-source-id-123'},
+                           headers=auth_headers)
+    assert response.status_code == 500
+    delete_chat.assert_called_once_with('chat-1')
+    rag_mocks['update_credits'].assert_not_called()
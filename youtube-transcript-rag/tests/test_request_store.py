@@ -0,0 +1,27 @@
+"""
+Test request store
+"""
+
+from app.services.request_store import RequestStore, PENDING
+
+
+def test_claim_then_complete_returns_recorded_response():
+    """Test a key is pending while claimed and returns its response once completed"""
+    store = RequestStore()
+    key = ('user-1', 'req-1')
+
+    assert store.claim(key) is None
+    assert store.claim(key) == PENDING
+
+    store.complete(key, {'chat_id': 'chat-1'})
+    assert store.claim(key) == {'chat_id': 'chat-1'}
+
+
+def test_released_key_can_be_claimed_again():
+    """Test releasing a failed request's key lets the retry claim it"""
+    store = RequestStore()
+    key = ('user-1', 'req-1')
+
+    store.claim(key)
+    store.release(key)
+    assert store.claim(key) is None
@@ -2,6 +2,7 @@
 Test Pydantic schema validation
 """
 
+import numpy as np
 import pytest
 from pydantic import ValidationError
 from app.models.schemas import (
@@ -10,6 +11,15 @@ from app.models.schemas import (
     ProcessTranscriptRequest,
     QueryRequest,
     PaginationParams,
+    PaginationInfo,
+    EmbeddingVector,
+    SourceListResponse,
+    UserResponse,
+    ErrorResponse,
+    SuccessResponse,
+    validate_request,
+    create_error_response,
+    create_success_response,
 )
 
 
@@ -41,6 +51,17 @@ class TestLoginRequest:
         request = LoginRequest(username='TestUser', password='password123')
         assert request.username == 'testuser'
 
+    def test_username_allows_underscore_and_hyphen(self):
+        """Test underscores and hyphens are accepted in usernames"""
+        request = LoginRequest(username='test_user-1', password='password123')
+        assert request.username == 'test_user-1'
+
+    def test_username_invalid_characters(self):
+        """Test usernames with other characters are rejected"""
+        with pytest.raises(ValidationError) as exc_info:
+            LoginRequest(username='test user!', password='password123')
+        assert 'alphanumeric' in str(exc_info.value)
+
 
 class TestCreateUserRequest:
     """Test CreateUserRequest schema validation"""
@@ -104,6 +125,7 @@ class TestQueryRequest:
             question='What is this video about?'
         )
         assert request.question == 'What is this video about?'
+        assert str(request.source_id) == '550e8400-e29b-41d4-a716-446655440000'
 
     def test_question_too_short(self):
         """Test question minimum length"""
@@ -117,7 +139,7 @@ class TestQueryRequest:
         """Test invalid source_id format"""
         with pytest.raises(ValidationError) as exc_info:
             QueryRequest(source_id='not-a-uuid', question='What is this?')
-        assert 'Invalid source_id format' in str(exc_info.value)
+        assert exc_info.value.errors()[0]['type'] == 'uuid_parsing'
 
 
 class TestPaginationParams:
@@ -149,3 +171,81 @@ class TestPaginationParams:
         """Test limit must be <= 100"""
         with pytest.raises(ValidationError):
             PaginationParams(limit=101)
+
+
+class TestValidateRequest:
+    """Test validate_request helper"""
+
+    def test_returns_model_instance(self):
+        """Test valid data returns the validated model"""
+        request = validate_request(LoginRequest, {'username': 'TestUser', 'password': 'password123'})
+        assert isinstance(request, LoginRequest)
+        assert request.username == 'testuser'
+
+    def test_raises_validation_error(self):
+        """Test invalid data raises ValidationError for the global error handler"""
+        with pytest.raises(ValidationError):
+            validate_request(LoginRequest, {'username': 'ab'})
+
+
+class TestUserResponse:
+    """Test UserResponse serialization"""
+
+    def test_created_at_serialized_as_iso(self):
+        """Test datetime fields serialize to ISO 8601 strings"""
+        user = UserResponse(id='1', username='testuser', credits=10, created_at='2025-01-01T00:00:00')
+        assert user.model_dump(mode='json')['created_at'] == '2025-01-01T00:00:00'
+
+
+class TestResponseHelpers:
+    """Test response helper functions"""
+
+    def test_error_response_matches_schema(self):
+        """Test create_error_response produces the ErrorResponse shape"""
+        response = create_error_response('NotFound', 'Resource not found')
+        assert response == ErrorResponse(error='NotFound', message='Resource not found').model_dump()
+
+    def test_success_response_matches_schema(self):
+        """Test create_success_response produces the SuccessResponse shape"""
+        response = create_success_response('Done', {'id': 1})
+        assert response == SuccessResponse(message='Done', data={'id': 1}).model_dump()
+
+
+class TestSourceListResponse:
+    """Test SourceListResponse pagination typing"""
+
+    def test_pagination_from_dict(self):
+        """Test pagination dict is validated into PaginationInfo"""
+        response = SourceListResponse(
+            sources=[],
+            pagination={'page': 1, 'limit': 20, 'total': 0, 'pages': 0}
+        )
+        assert isinstance(response.pagination, PaginationInfo)
+        assert response.model_dump()['pagination'] == {'page': 1, 'limit': 20, 'total': 0, 'pages': 0}
+
+    def test_pagination_missing_field(self):
+        """Test pagination requires all fields"""
+        with pytest.raises(ValidationError):
+            SourceListResponse(sources=[], pagination={'page': 1, 'limit': 20})
+
+
+class TestEmbeddingVector:
+    """Test EmbeddingVector validation"""
+
+    def test_values_stored_as_float32_array(self):
+        """Test list input is converted to a float32 ndarray"""
+        vector = EmbeddingVector(id='vid_0', values=[0.1] * 384, metadata={})
+        assert isinstance(vector.values, np.ndarray)
+        assert vector.values.dtype == np.float32
+        assert vector.values.shape == (384,)
+
+    def test_wrong_dimensions(self):
+        """Test embeddings must have 384 dimensions"""
+        with pytest.raises(ValidationError) as exc_info:
+            EmbeddingVector(id='vid_0', values=[0.1] * 10, metadata={})
+        assert '384 dimensions' in str(exc_info.value)
+
+    def test_json_serialization(self):
+        """Test values serialize to a plain list in JSON mode"""
+        vector = EmbeddingVector(id='vid_0', values=[0.5] * 384, metadata={})
+        assert vector.model_dump(mode='json')['values'] == [0.5] * 384
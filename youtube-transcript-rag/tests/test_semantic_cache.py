@@ -0,0 +1,75 @@
+"""
+Test semantic cache
+"""
+
+import numpy as np
+from app.services.semantic_cache import SemanticCache
+
+
+def make_cache(**overrides):
+    options = dict(ttl=60, max_entries_per_scope=2, context_threshold=0.95, answer_threshold=0.98)
+    options.update(overrides)
+    return SemanticCache(**options)
+
+
+def test_lookup_matches_similar_embedding():
+    """Test a near-identical question embedding hits the cache"""
+    cache = make_cache()
+    cache.store('source-1', [1.0, 0.0, 0.0], ['chunk'], result={'response': []}, model='m')
+
+    hit = cache.lookup('source-1', [0.99, 0.01, 0.0])
+    assert hit is not None
+    similarity, entry = hit
+    assert similarity > 0.98
+    assert entry['context_chunks'] == ['chunk']
+    assert entry['model'] == 'm'
+
+
+def test_lookup_misses_dissimilar_embedding_and_other_scope():
+    """Test unrelated questions and other scopes do not hit"""
+    cache = make_cache()
+    cache.store('source-1', [1.0, 0.0, 0.0], ['chunk'])
+
+    assert cache.lookup('source-1', [0.0, 1.0, 0.0]) is None
+    assert cache.lookup('source-2', [1.0, 0.0, 0.0]) is None
+
+
+def test_expired_entries_are_ignored():
+    """Test entries past their TTL are not returned"""
+    cache = make_cache(ttl=-1)
+    cache.store('source-1', np.array([1.0, 0.0]), ['chunk'])
+
+    assert cache.lookup('source-1', np.array([1.0, 0.0])) is None
+
+
+def test_oldest_entries_are_evicted():
+    """Test each scope keeps at most max_entries_per_scope entries"""
+    cache = make_cache()
+    cache.store('source-1', [1.0, 0.0, 0.0], ['first'])
+    cache.store('source-1', [0.0, 1.0, 0.0], ['second'])
+    cache.store('source-1', [0.0, 0.0, 1.0], ['third'])
+
+    assert cache.lookup('source-1', [1.0, 0.0, 0.0]) is None
+    assert cache.lookup('source-1', [0.0, 0.0, 1.0])[1]['context_chunks'] == ['third']
+
+
+def test_least_recently_used_scopes_are_evicted():
+    """Test the number of scopes is bounded, dropping the least recently used one"""
+    cache = make_cache(max_scopes=2)
+    cache.store('source-1', [1.0, 0.0], ['one'])
+    cache.store('source-2', [1.0, 0.0], ['two'])
+    cache.lookup('source-1', [1.0, 0.0])
+    cache.store('source-3', [1.0, 0.0], ['three'])
+
+    assert cache.lookup('source-2', [1.0, 0.0]) is None
+    assert cache.lookup('source-1', [1.0, 0.0])[1]['context_chunks'] == ['one']
+    assert cache.lookup('source-3', [1.0, 0.0])[1]['context_chunks'] == ['three']
+
+
+def test_expired_scopes_are_dropped_without_lookup():
+    """Test idle scopes do not stay in memory until they are looked up again"""
+    cache = make_cache(ttl=-1)
+    cache.store('source-1', [1.0, 0.0], ['chunk'])
+    cache.store('source-2', [1.0, 0.0], ['chunk'])
+
+    assert len(cache._scopes) == 0
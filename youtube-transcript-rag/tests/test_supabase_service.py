@@ -0,0 +1,45 @@
+"""
+Test Supabase service caching
+"""
+
+from postgrest import SyncPostgrestClient
+from postgrest._sync.request_builder import SyncSelectRequestBuilder
+from app.services import supabase_service
+
+
+def test_source_owner_is_remembered_until_delete(mocker):
+    """Test ownership is read once, reused, and forgotten when the source is deleted"""
+    supabase_service._source_owner_cache.clear()
+    client = mocker.patch.object(supabase_service, 'get_supabase_client').return_value
+    table = client.table.return_value
+    table.select.return_value.eq.return_value.execute.return_value.data = [{'user_id': 'user-1'}]
+
+    assert supabase_service.get_source_owner('src-1') == 'user-1'
+    assert supabase_service.get_source_owner('src-1') == 'user-1'
+    assert table.select.call_count == 1
+
+    supabase_service.delete_source('src-1')
+    supabase_service.get_source_owner('src-1')
+    assert table.select.call_count == 2
+    supabase_service._source_owner_cache.clear()
+
+
+def test_sources_keyset_page_orders_by_created_at_then_id(mocker):
+    """Test the keyset page sorts by both keys, newest first, so the id tie-break is in the request"""
+    supabase_service._source_owner_cache.clear()
+    postgrest = SyncPostgrestClient('http://localhost')
+    mocker.patch.object(supabase_service, 'get_supabase_client').return_value.table.side_effect = postgrest.from_
+    sent = []
+
+    def execute(builder):
+        sent.append(builder.params)
+        return mocker.Mock(data=[], count=None)
+
+    mocker.patch.object(SyncSelectRequestBuilder, 'execute', autospec=True, side_effect=execute)
+
+    supabase_service.get_sources_page_by_user(
+        'user-1', limit=20, before=('2025-01-02T00:00:00+00:00', 'c56a4180-65aa-42ec-a945-5fd21dec0538')
+    )
+
+    assert sent[0].get_list('order') == ['created_at.desc,id.desc']
+    assert sent[0]['limit'] == '20'
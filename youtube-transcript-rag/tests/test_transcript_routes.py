@@ -0,0 +1,122 @@
+"""
+Test transcript routes
+"""
+
+from flask import json
+from app.routes import transcript_routes
+from app.utils.helpers import encode_cursor
+
+SOURCES = [
+    {'id': 'c56a4180-65aa-42ec-a945-5fd21dec0538', 'title': 'B', 'video_ids': ['b'], 'status': 'ready', 'created_at': '2025-01-02T00:00:00+00:00'},
+    {'id': '3f2504e0-4f89-41d3-9a0c-0305e82c3301', 'title': 'A', 'video_ids': ['a'], 'status': 'ready', 'created_at': '2025-01-01T00:00:00+00:00'},
+]
+
+
+def test_sources_page_mode_includes_total_and_cursor(client, auth_headers, mocker):
+    """Test numbered pages keep the total and also return a cursor for the next page"""
+    get_page = mocker.patch.object(transcript_routes, 'get_sources_page_by_user',
+                                   return_value={'sources': SOURCES, 'total': 5})
+
+    response = client.get('/api/transcripts/sources?page=2&limit=2', headers=auth_headers)
+    assert response.status_code == 200
+
+    pagination = json.loads(response.data)['pagination']
+    assert pagination == {'page': 2, 'limit': 2, 'total': 5, 'pages': 3,
+                          'next_cursor': encode_cursor('2025-01-01T00:00:00+00:00', SOURCES[1]['id'])}
+    get_page.assert_called_once_with('test-user-id-123', limit=2, offset=2, before=None)
+
+
+def test_sources_before_cursor_skips_count(client, auth_headers, mocker):
+    """Test the before cursor is decoded into (created_at, id) and no total is reported"""
+    get_page = mocker.patch.object(transcript_routes, 'get_sources_page_by_user',
+                                   return_value={'sources': SOURCES[1:], 'total': None})
+
+    response = client.get(
+        '/api/transcripts/sources',
+        query_string={'before': encode_cursor('2025-01-02T00:00:00+00:00', SOURCES[0]['id'])},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    data = json.loads(response.data)
+    assert data['sources'] == SOURCES[1:]
+    assert data['pagination'] == {'limit': 20, 'next_cursor': None}
+    get_page.assert_called_once_with(
+        'test-user-id-123', limit=20, offset=0, before=('2025-01-02T00:00:00+00:00', SOURCES[0]['id'])
+    )
+
+
+def test_sources_invalid_cursor(client, auth_headers, mocker):
+    """Test cursors that are not a timestamp and UUID are rejected before querying"""
+    get_page = mocker.patch.object(transcript_routes, 'get_sources_page_by_user')
+
+    for cursor in ('nonsense', '2025-01-02T00:00:00+00:00_src-2', encode_cursor('2025-01-02', 'src-2')):
+        response = client.get('/api/transcripts/sources', query_string={'before': cursor}, headers=auth_headers)
+        assert response.status_code == 400
+    get_page.assert_not_called()
+
+
+def test_retry_source_runs_in_background(client, auth_headers, mocker, mock_source):
+    """Test retrying a failed source flips it to processing in one update and queues the pipeline"""
+    mocker.patch.object(transcript_routes, 'get_source_owner', return_value='test-user-id-123')
+    set_status = mocker.patch.object(transcript_routes, 'set_status_if', return_value=dict(mock_source, status='processing'))
+    submit = mocker.patch.object(transcript_routes, 'submit_background_task', return_value=True)
+
+    response = client.post('/api/transcripts/sources/test-source-id-123/retry', headers=auth_headers)
+    assert response.status_code == 202
+    assert json.loads(response.data)['status'] == 'processing'
+
+    set_status.assert_called_once_with('test-source-id-123', 'failed', 'processing')
+    submit.assert_called_once_with(
+        transcript_routes.process_source_background, 'test-source-id-123', ['dQw4w9WgXcQ'], 'test-user-id-123'
+    )
+
+
+def test_retry_source_not_failed(client, auth_headers, mocker):
+    """Test a source that isn't failed is left alone when the conditional update matches nothing"""
+    mocker.patch.object(transcript_routes, 'get_source_owner', return_value='test-user-id-123')
+    mocker.patch.object(transcript_routes, 'set_status_if', return_value=None)
+    submit = mocker.patch.object(transcript_routes, 'submit_background_task')
+
+    response = client.post('/api/transcripts/sources/test-source-id-123/retry', headers=auth_headers)
+    assert response.status_code == 400
+    submit.assert_not_called()
+
+
+def test_background_processing_skips_videos_already_stored(mocker):
+    """Test only videos missing from the vector store have their transcripts fetched"""
+    pinecone_service = mocker.patch.object(transcript_routes, 'get_pinecone_service').return_value
+    pinecone_service.get_existing_video_ids.return_value = {'old'}
+    pinecone_service.store_transcripts_batch.return_value = {
+        'results': [{'status': 'stored', 'video_id': 'new', 'chunks': 3}], 'errors': []
+    }
+    fetch = mocker.patch.object(transcript_routes.TranscriptService, 'fetch_multiple_transcripts',
+                                return_value={'results': [{'video_id': 'new'}], 'errors': []})
+    update_status = mocker.patch.object(transcript_routes, 'update_source_status')
+
+    transcript_routes.process_source_background('src-1', ['old', 'new'], 'user-1')
+
+    fetch.assert_called_once_with(['new'])
+    update_status.assert_called_once_with('src-1', 'ready')
+
+
+def test_background_processing_sets_failed_once(mocker):
+    """Test an unexpected error still ends in a single terminal status write"""
+    mocker.patch.object(transcript_routes, 'get_pinecone_service', side_effect=Exception('boom'))
+    update_status = mocker.patch.object(transcript_routes, 'update_source_status')
+
+    transcript_routes.process_source_background('src-1', ['new'], 'user-1')
+
+    update_status.assert_called_once_with('src-1', 'failed')
+
+
+def test_delete_source_checks_cached_owner(client, auth_headers, mocker):
+    """Test deleting someone else's source is refused from the owner lookup alone"""
+    mocker.patch.object(transcript_routes, 'get_source_owner', return_value='someone-else')
+    get_source = mocker.patch.object(transcript_routes, 'get_source_by_id')
+    delete = mocker.patch.object(transcript_routes, 'delete_source')
+
+    response = client.delete('/api/transcripts/sources/test-source-id-123', headers=auth_headers)
+    assert response.status_code == 403
+    get_source.assert_not_called()
+    delete.assert_not_called()
@@ -0,0 +1,50 @@
+"""
+Test YouTube metadata and playlist caching
+"""
+
+from app.services import youtube_service
+from app.services.youtube_service import YouTubeService
+
+
+def test_video_metadata_is_cached_until_refresh(mocker):
+    """Test repeated metadata lookups hit oEmbed once unless force_refresh is set"""
+    youtube_service._metadata_cache.clear()
+    response = mocker.Mock()
+    response.json.return_value = {'title': 'Talk', 'author_name': 'Someone', 'thumbnail_url': 'thumb'}
+    get = mocker.patch.object(youtube_service._http, 'get', return_value=response)
+
+    assert YouTubeService.get_video_metadata('abc12345678')['title'] == 'Talk'
+    assert YouTubeService.get_video_metadata('abc12345678')['title'] == 'Talk'
+    assert get.call_count == 1
+
+    YouTubeService.get_video_metadata('abc12345678', force_refresh=True)
+    assert get.call_count == 2
+    youtube_service._metadata_cache.clear()
+
+
+def test_failed_metadata_lookup_is_not_cached(mocker):
+    """Test the fallback title is not cached so the next call retries YouTube"""
+    youtube_service._metadata_cache.clear()
+    get = mocker.patch.object(youtube_service._http, 'get', side_effect=Exception('timeout'))
+
+    assert YouTubeService.get_video_metadata('abc12345678')['title'] == 'Video abc12345'
+    YouTubeService.get_video_metadata('abc12345678')
+    assert get.call_count == 2
+
+
+def test_playlist_video_ids_are_cached_per_playlist_and_limit(mocker):
+    """Test a playlist is resolved once per limit and truncated lazily"""
+    youtube_service._playlist_cache.clear()
+    playlist = mocker.patch.object(youtube_service, 'Playlist')
+    playlist.return_value.url_generator.side_effect = lambda: iter(
+        f'https://www.youtube.com/watch?v=video{i:06d}' for i in range(10)
+    )
+    url = 'https://www.youtube.com/playlist?list=PL123'
+
+    assert YouTubeService.get_video_ids_from_playlist(url, limit=3) == ['video000000', 'video000001', 'video000002']
+    assert YouTubeService.get_video_ids_from_playlist(url, limit=3) == ['video000000', 'video000001', 'video000002']
+    assert playlist.call_count == 1
+
+    assert len(YouTubeService.get_video_ids_from_playlist(url, limit=5)) == 5
+    assert playlist.call_count == 2
+    youtube_service._playlist_cache.clear()